@@ -0,0 +1,40 @@
+"""Shared Hunyuan3D-2 import setup for the test_hunyuan3d*.py scripts.
+
+Importing this module puts the Hunyuan3D-2 checkout on sys.path and makes it
+the working directory (hy3dgen resolves some assets relative to CWD). Warm
+its bytecode cache once with:
+
+    python -m compileall C:\\GIT\\progship\\Hunyuan3D-2
+"""
+import functools
+import os
+import sys
+
+HUNYUAN_PATH = r"C:\GIT\progship\Hunyuan3D-2"
+MODEL_PATH = 'tencent/Hunyuan3D-2'
+
+if HUNYUAN_PATH not in sys.path:
+    sys.path.insert(0, HUNYUAN_PATH)
+if os.getcwd() != HUNYUAN_PATH:
+    os.chdir(HUNYUAN_PATH)
+
+
+@functools.lru_cache(maxsize=None)
+def get_shape_pipeline(dtype=None):
+    """Load the shape generation pipeline once per process."""
+    from hy3dgen.shapegen import Hunyuan3DDiTFlowMatchingPipeline
+    if dtype is None:
+        return Hunyuan3DDiTFlowMatchingPipeline.from_pretrained(MODEL_PATH)
+    return Hunyuan3DDiTFlowMatchingPipeline.from_pretrained(MODEL_PATH, dtype=dtype)
+
+
+@functools.lru_cache(maxsize=None)
+def get_texture_pipeline():
+    """Load the texture generation pipeline once per process."""
+    from hy3dgen.texgen import Hunyuan3DPaintPipeline
+    return Hunyuan3DPaintPipeline.from_pretrained(MODEL_PATH)
+
+
+def get_pipelines(dtype=None):
+    """Return (shape pipeline, texture pipeline), loading each at most once."""
+    return get_shape_pipeline(dtype), get_texture_pipeline()
@@ -21,6 +21,10 @@ from PIL import Image
 import json
 import time
 
+# Block-buffer stdout (it is line-buffered on a console, flushing every
+# status line); flushed explicitly before each long-running phase
+sys.stdout.reconfigure(line_buffering=False)
+
 print("=" * 80)
 print("BATCH REGENERATION: All Concept Art with Verbose Descriptions")
 print("=" * 80)
@@ -31,6 +35,7 @@ output_dir.mkdir(exist_ok=True, parents=True)
 
 # Generate ship structure
 print("\n[1/3] Generating ship structure...")
+sys.stdout.flush()
 generator = ShipStructureGenerator()
 ship = generator.generate_ship(
     ship_type_id="colony_rotating_solar",
@@ -41,6 +46,7 @@ print(f"  Generated ship with {len(ship.rooms)} rooms, {len(ship.systems)} syste
 
 # Generate descriptions for all components
 print("\n[2/3] Generating verbose descriptions...")
+sys.stdout.flush()
 desc_gen = DescriptionGenerator()
 descriptions = desc_gen.generate_descriptions(
     ship=ship,
@@ -58,6 +64,7 @@ print(f"  Saved to: {desc_path}")
 # Generate concept art for all components
 print("\n[3/3] Generating concept art (product catalog style)...")
 print("  This will take 2-5 minutes depending on model speed...")
+sys.stdout.flush()
 
 image_pipeline = ImagePipeline()
 results = image_pipeline.generate_batch(
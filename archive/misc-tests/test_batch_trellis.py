@@ -11,131 +11,238 @@ import sys
 sys.path.insert(0, "/root/TRELLIS")
 
 from PIL import Image
-from trellis.pipelines import TrellisImageTo3DPipeline
 import trimesh
 from pathlib import Path
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.connection import Client
+import multiprocessing
+import queue
+import threading
 import time
 
-print("=" * 80)
-print("BATCH TRELLIS CONVERSION: All Concept Art → 3D Models")
-print("=" * 80)
-
-# Find all generated images
-input_dir = Path("/mnt/c/GIT/progship/progship-core/output/images_regenerated")
-output_dir = Path("/root/models_batch")
-output_dir.mkdir(exist_ok=True)
-
-# Find all *_main.png images
-image_files = []
-for subdir in input_dir.iterdir():
-    if subdir.is_dir():
-        main_image = subdir / f"{subdir.name}_main.png"
-        if main_image.exists():
-            image_files.append((subdir.name, main_image))
-
-print(f"\nFound {len(image_files)} images to convert:")
-for component_id, path in image_files:
-    size_mb = path.stat().st_size / (1024 * 1024)
-    print(f"  - {component_id} ({size_mb:.1f} MB)")
-
-# Load TRELLIS pipeline once
-print("\n" + "=" * 80)
-print("LOADING TRELLIS PIPELINE")
-print("=" * 80)
-pipeline = TrellisImageTo3DPipeline.from_pretrained("microsoft/TRELLIS-image-large")
-pipeline.cuda()
-print("[OK] Pipeline loaded on GPU\n")
-
-# Process each image
-results = []
-start_time = time.time()
-
-print("=" * 80)
-print("CONVERTING IMAGES TO 3D")
-print("=" * 80)
-
-for i, (component_id, image_path) in enumerate(image_files, 1):
-    print(f"\n[{i}/{len(image_files)}] {component_id}")
-    print(f"  Input: {image_path.name}")
-    
+from trellis_worker import WORKER_ADDRESS, WORKER_AUTHKEY, mesh_to_host
+
+# Decode images on a background thread so the GPU never waits on PNG decode.
+# TRELLIS' pipeline.run() takes a single image, so "batching" here means keeping
+# up to PREFETCH_DEPTH decoded images queued ahead of the inference loop.
+PREFETCH_DEPTH = 4
+
+# GLB serialisation is numpy-heavy CPU work; separate processes keep it from
+# contending with the inference loop for the GIL.
+EXPORT_WORKERS = 4
+
+
+def prefetch_images(image_files, image_queue, preprocess=None):
+    """
+    Decode each image and hand it to the inference loop (None marks the end).
+
+    If `preprocess` is given (TRELLIS' own background removal, crop and resize
+    to its 518px input), it runs here too, so the inference loop only does GPU work.
+    """
+    for component_id, image_path in image_files:
+        try:
+            image = Image.open(image_path)
+            image.load()
+            original_size = image.size
+            if preprocess is not None:
+                image = preprocess(image)
+            image_queue.put((component_id, image_path, original_size, image, None))
+        except Exception as e:
+            image_queue.put((component_id, image_path, None, None, e))
+    image_queue.put(None)
+
+
+def run_trellis(worker, pipeline, image, seed=42):
+    """
+    Convert one image to a mesh, returning host (vertices, faces) arrays.
+
+    Locally the image must already be preprocessed (see prefetch_images);
+    the worker preprocesses on its side.
+    """
+    if worker is not None:
+        worker.send((image, seed))
+        reply = worker.recv()
+        if reply[0] == "error":
+            raise RuntimeError(reply[1])
+        _, vertices, faces = reply
+        return vertices, faces
+
+    outputs = pipeline.run(image, seed=seed, preprocess_image=False)
+    return mesh_to_host(outputs['mesh'][0])
+
+
+def export_glb(component_id, vertices, faces, glb_path, convert_time):
+    """Write the GLB and check it on disk (runs in an export worker process)."""
+    glb_path = Path(glb_path)
+    tmesh = trimesh.Trimesh(vertices=vertices, faces=faces)
+    tmesh.export(glb_path)
+
+    # Check file
+    if not glb_path.exists():
+        print(f"  [FAIL] {component_id}: GLB not created")
+        return {'component_id': component_id, 'success': False}
+
+    size_mb = glb_path.stat().st_size / (1024 * 1024)
+    print(f"  [OK] {glb_path.name} ({size_mb:.2f} MB, {len(vertices):,} verts, {convert_time:.1f}s)")
+    return {
+        'component_id': component_id,
+        'success': True,
+        'glb_path': str(glb_path),
+        'size_mb': size_mb,
+        'vertices': len(vertices),
+        'faces': len(faces),
+        'time': convert_time
+    }
+
+
+def collect_result(component_id, result):
+    """Resolve a pending export, turning export failures into error entries."""
+    if not isinstance(result, Future):
+        return result
     try:
-        # Load and convert
-        image = Image.open(image_path)
-        print(f"  Resolution: {image.size}")
-        print(f"  Converting... (this takes ~8 seconds)")
-        
-        convert_start = time.time()
-        outputs = pipeline.run(image, seed=42)
-        convert_time = time.time() - convert_start
-        
-        # Extract mesh
-        mesh = outputs['mesh'][0]
-        vertices = mesh.vertices.cpu().numpy()
-        faces = mesh.faces.cpu().numpy()
-        
-        # Create trimesh and export
-        tmesh = trimesh.Trimesh(vertices=vertices, faces=faces)
-        glb_path = output_dir / f"{component_id}.glb"
-        tmesh.export(glb_path)
-        
-        # Check file
-        if glb_path.exists():
-            size_mb = glb_path.stat().st_size / (1024 * 1024)
-            print(f"  [OK] {glb_path.name} ({size_mb:.2f} MB, {len(vertices):,} verts, {convert_time:.1f}s)")
-            
-            results.append({
-                'component_id': component_id,
-                'success': True,
-                'glb_path': str(glb_path),
-                'size_mb': size_mb,
-                'vertices': len(vertices),
-                'faces': len(faces),
-                'time': convert_time
-            })
-        else:
-            print(f"  [FAIL] GLB not created")
-            results.append({'component_id': component_id, 'success': False})
-            
+        return result.result()
     except Exception as e:
-        print(f"  [ERROR] {type(e).__name__}: {e}")
-        results.append({'component_id': component_id, 'success': False, 'error': str(e)})
-
-total_time = time.time() - start_time
-
-# Summary
-print("\n" + "=" * 80)
-print("BATCH CONVERSION COMPLETE")
-print("=" * 80)
-
-successful = [r for r in results if r.get('success')]
-failed = [r for r in results if not r.get('success')]
-
-print(f"\nTotal time: {total_time:.1f} seconds ({total_time/60:.1f} minutes)")
-print(f"Processed: {len(image_files)} images")
-print(f"Successful: {len(successful)}")
-print(f"Failed: {len(failed)}")
-
-if successful:
-    print(f"\nSuccessful conversions:")
-    for r in successful:
-        print(f"  ✓ {r['component_id']}: {r['size_mb']:.1f} MB, {r['vertices']:,} verts, {r['time']:.1f}s")
-    
-    total_size = sum(r['size_mb'] for r in successful)
-    avg_time = sum(r['time'] for r in successful) / len(successful)
-    print(f"\nTotal size: {total_size:.1f} MB")
-    print(f"Average conversion time: {avg_time:.1f}s per model")
-
-if failed:
-    print(f"\nFailed conversions:")
-    for r in failed:
-        error = r.get('error', 'Unknown error')
-        print(f"  ✗ {r['component_id']}: {error}")
-
-print("\n" + "=" * 80)
-print("NEXT STEPS")
-print("=" * 80)
-print(f"1. Copy models to Windows:")
-print(f"   wsl -d Ubuntu -- bash -c \"cp /root/models_batch/*.glb /mnt/c/GIT/progship/progship-core/output/models/\"")
-print(f"2. View models in Godot/Blender/online GLB viewer")
-print(f"3. Validate geometry and scale")
-print(f"4. Build Phase 6: Asset bundle manifest")
+        print(f"  [ERROR] {component_id}: {type(e).__name__}: {e}")
+        return {'component_id': component_id, 'success': False, 'error': str(e)}
+
+
+def main():
+    # Block-buffer stdout (it is line-buffered on a console, flushing every
+    # status line); the loop flushes once per image, before inference
+    sys.stdout.reconfigure(line_buffering=False)
+
+    print("=" * 80)
+    print("BATCH TRELLIS CONVERSION: All Concept Art → 3D Models")
+    print("=" * 80)
+
+    # Find all generated images
+    input_dir = Path("/mnt/c/GIT/progship/progship-core/output/images_regenerated")
+    output_dir = Path("/root/models_batch")
+    output_dir.mkdir(exist_ok=True)
+
+    # Find all <component>/<component>_main.png images in one directory walk
+    image_files = [
+        (p.parent.name, p) for p in input_dir.glob("*/*_main.png")
+        if p.name == f"{p.parent.name}_main.png"
+    ]
+
+    print(f"\nFound {len(image_files)} images to convert:")
+    for component_id, path in image_files:
+        size_mb = path.stat().st_size / (1024 * 1024)
+        print(f"  - {component_id} ({size_mb:.1f} MB)")
+
+    # "spawn" so export workers never inherit this process' CUDA context
+    export_pool = ProcessPoolExecutor(
+        max_workers=EXPORT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    )
+
+    # Prefer a resident trellis_worker.py (pipeline already warm on the GPU);
+    # otherwise load TRELLIS pipeline once in this process
+    print("\n" + "=" * 80)
+    print("LOADING TRELLIS PIPELINE")
+    print("=" * 80)
+    worker = None
+    pipeline = None
+    try:
+        worker = Client(WORKER_ADDRESS, authkey=WORKER_AUTHKEY)
+        print(f"[OK] Using TRELLIS worker at {WORKER_ADDRESS[0]}:{WORKER_ADDRESS[1]}\n")
+    except ConnectionRefusedError:
+        from trellis.pipelines import TrellisImageTo3DPipeline
+        pipeline = TrellisImageTo3DPipeline.from_pretrained("microsoft/TRELLIS-image-large")
+        pipeline.cuda()
+        print("[OK] Pipeline loaded on GPU")
+        print("     (start trellis_worker.py to keep it loaded between runs)\n")
+
+    image_queue = queue.Queue(maxsize=PREFETCH_DEPTH)
+    preprocess = pipeline.preprocess_image if pipeline is not None else None
+    prefetch_thread = threading.Thread(
+        target=prefetch_images, args=(image_files, image_queue, preprocess), daemon=True
+    )
+
+    # Process each image
+    results = []
+    start_time = time.time()
+
+    print("=" * 80)
+    print("CONVERTING IMAGES TO 3D")
+    print("=" * 80)
+
+    prefetch_thread.start()
+    i = 0
+    while (item := image_queue.get()) is not None:
+        component_id, image_path, original_size, image, load_error = item
+        i += 1
+        print(f"\n[{i}/{len(image_files)}] {component_id}")
+        print(f"  Input: {image_path.name}")
+
+        try:
+            if load_error is not None:
+                raise load_error
+
+            print(f"  Resolution: {original_size}")
+            print(f"  Converting... (this takes ~8 seconds)")
+            sys.stdout.flush()
+
+            convert_start = time.time()
+            vertices, faces = run_trellis(worker, pipeline, image, seed=42)
+            convert_time = time.time() - convert_start
+
+            # Create trimesh and export in the background so the next
+            # pipeline.run() starts as soon as the mesh leaves the GPU
+            glb_path = output_dir / f"{component_id}.glb"
+            results.append(export_pool.submit(
+                export_glb, component_id, vertices, faces, str(glb_path), convert_time
+            ))
+
+        except Exception as e:
+            print(f"  [ERROR] {type(e).__name__}: {e}")
+            results.append({'component_id': component_id, 'success': False, 'error': str(e)})
+
+    export_pool.shutdown(wait=True)
+    if worker is not None:
+        worker.close()
+    results = [collect_result(component_id, r) for (component_id, _), r in zip(image_files, results)]
+
+    total_time = time.time() - start_time
+
+    # Summary
+    print("\n" + "=" * 80)
+    print("BATCH CONVERSION COMPLETE")
+    print("=" * 80)
+
+    successful = [r for r in results if r.get('success')]
+    failed = [r for r in results if not r.get('success')]
+
+    print(f"\nTotal time: {total_time:.1f} seconds ({total_time/60:.1f} minutes)")
+    print(f"Processed: {len(image_files)} images")
+    print(f"Successful: {len(successful)}")
+    print(f"Failed: {len(failed)}")
+
+    if successful:
+        print(f"\nSuccessful conversions:")
+        for r in successful:
+            print(f"  ✓ {r['component_id']}: {r['size_mb']:.1f} MB, {r['vertices']:,} verts, {r['time']:.1f}s")
+
+        total_size = sum(r['size_mb'] for r in successful)
+        avg_time = sum(r['time'] for r in successful) / len(successful)
+        print(f"\nTotal size: {total_size:.1f} MB")
+        print(f"Average conversion time: {avg_time:.1f}s per model")
+
+    if failed:
+        print(f"\nFailed conversions:")
+        for r in failed:
+            error = r.get('error', 'Unknown error')
+            print(f"  ✗ {r['component_id']}: {error}")
+
+    print("\n" + "=" * 80)
+    print("NEXT STEPS")
+    print("=" * 80)
+    print(f"1. Copy models to Windows:")
+    print(f"   wsl -d Ubuntu -- bash -c \"cp /root/models_batch/*.glb /mnt/c/GIT/progship/progship-core/output/models/\"")
+    print(f"2. View models in Godot/Blender/online GLB viewer")
+    print(f"3. Validate geometry and scale")
+    print(f"4. Build Phase 6: Asset bundle manifest")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,7 @@
 #!/usr/bin/env python3
 """Test Hunyuan3D-2 with extensive debugging"""
-import sys
-import os
-
-# Add Hunyuan3D-2 to path
-hunyuan_path = r"C:\GIT\progship\Hunyuan3D-2"
-if hunyuan_path not in sys.path:
-    sys.path.insert(0, hunyuan_path)
-
-# Change to Hunyuan directory for relative imports
-os.chdir(hunyuan_path)
+# Puts Hunyuan3D-2 on sys.path and makes it the CWD for relative imports
+from _hy3d_shim import get_shape_pipeline, get_texture_pipeline
 
 import torch
 from PIL import Image
@@ -29,26 +21,23 @@ if torch.cuda.is_available():
 else:
     print("\n⚠ WARNING: CUDA not available!")
 
-# Import pipelines
-from hy3dgen.shapegen import Hunyuan3DDiTFlowMatchingPipeline
-from hy3dgen.texgen import Hunyuan3DPaintPipeline
-
 print("\n" + "-" * 80)
 print("PHASE 1: Model Loading")
 print("-" * 80)
 
-model_path = 'tencent/Hunyuan3D-2'
-
 print("\n1. Loading shape pipeline...")
 start = time.time()
-pipeline_shapegen = Hunyuan3DDiTFlowMatchingPipeline.from_pretrained(model_path)
+pipeline_shapegen = get_shape_pipeline()
 print(f"   ✓ Loaded in {time.time() - start:.1f}s")
 print(f"   Device: {pipeline_shapegen.device if hasattr(pipeline_shapegen, 'device') else 'unknown'}")
 
 print("\n2. Loading texture pipeline...")
 start = time.time()
-pipeline_texgen = Hunyuan3DPaintPipeline.from_pretrained(model_path)
-print(f"   ✓ Loaded in {time.time() - start:.1f}s")
+pipeline_texgen = get_texture_pipeline()
+# Keep the delight/multiview diffusion models in host memory and stream each
+# sub-model onto the GPU only while it runs
+pipeline_texgen.enable_model_cpu_offload()
+print(f"   ✓ Loaded in {time.time() - start:.1f}s (texture models CPU-offloaded)")
 
 # Check memory after loading
 if torch.cuda.is_available():
@@ -90,6 +79,17 @@ if torch.cuda.is_available():
     print(f"    Allocated: {allocated:.2f} GB")
     print(f"    Reserved: {reserved:.2f} GB")
 
+# The shape DiT and VAE aren't used for texturing; park them in host memory
+# so the texture stage gets the VRAM they were holding
+pipeline_shapegen.to("cpu")
+if torch.cuda.is_available():
+    torch.cuda.empty_cache()
+    allocated = torch.cuda.memory_allocated(0) / 1024**3
+    reserved = torch.cuda.memory_reserved(0) / 1024**3
+    print(f"\n  GPU Memory after offloading shape pipeline:")
+    print(f"    Allocated: {allocated:.2f} GB")
+    print(f"    Reserved: {reserved:.2f} GB")
+
 print("\n" + "-" * 80)
 print("PHASE 4: Texture Generation (DEBUG)")
 print("-" * 80)
@@ -4,25 +4,51 @@ Test StableFast3D via Gradio Client (no local install needed).
 Uses HuggingFace Space API to avoid compilation issues.
 """
 from gradio_client import Client, handle_file
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import argparse
+import shutil
+import json
 import time
 
+SPACE = "stabilityai/stable-fast-3d"
+API_CACHE = Path.home() / ".cache" / "progship" / "sf3d_api.json"
+API_CACHE_TTL = 24 * 60 * 60  # Re-fetch the endpoint schema once a day
+
+
+def get_api_info(client):
+    """Return the Space's endpoint schema, from the local cache when fresh."""
+    if API_CACHE.exists() and API_CACHE.stat().st_mtime > time.time() - API_CACHE_TTL:
+        with open(API_CACHE, 'r') as f:
+            return json.load(f)
+    api_info = client.view_api(return_format="dict", print_info=False)
+    API_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    with open(API_CACHE, 'w') as f:
+        json.dump(api_info, f, indent=2)
+    return api_info
+
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--verbose", action="store_true", help="List the Space's API endpoints")
+args = parser.parse_args()
+
 print("=" * 80)
 print("StableFast3D Test via Gradio Client: Command Console")
 print("=" * 80)
 
 # Connect to HuggingFace Space
 print("\nConnecting to StableFast3D Space...")
-client = Client("stabilityai/stable-fast-3d")
+client = Client(SPACE)
 print(f"[OK] Connected")
 
-# View API to find correct endpoint
-print("\nChecking available API endpoints...")
-api_info = client.view_api(return_format="dict")
-print(f"Available endpoints:")
-for endpoint in api_info.get("named_endpoints", {}).values():
-    print(f"  - {endpoint.get('api_name')}: {endpoint.get('parameters', [])}")
-print()
+# View API to find correct endpoint (cached, see API_CACHE)
+if args.verbose:
+    print("\nChecking available API endpoints...")
+    api_info = get_api_info(client)
+    print(f"Available endpoints:")
+    for endpoint in api_info.get("named_endpoints", {}).values():
+        print(f"  - {endpoint.get('api_name')}: {endpoint.get('parameters', [])}")
+    print()
 
 # Test image
 image_path = "/mnt/c/GIT/progship/progship-core/output/images_regenerated/command_console/command_console_main.png"
@@ -35,7 +61,8 @@ print("This may take 30-60 seconds (API queue + generation)...")
 
 start = time.time()
 try:
-    result = client.predict(
+    # submit() queues the job and polls the Space in a background thread
+    job = client.submit(
         input_image=handle_file(image_path),
         foreground_ratio=0.85,
         remesh_option="None",
@@ -43,6 +70,7 @@ try:
         texture_size=1024,
         api_name="/run_button"
     )
+    result = job.result()
     elapsed = time.time() - start
     
     print(f"[OK] Generation complete in {elapsed:.1f}s")
@@ -55,23 +83,24 @@ try:
     print(f"\nPreview: {preview_image_path}")
     print(f"Model: {model_path}")
     
-    # Copy model to our output
+    # Copy model to our output and to Windows at the same time: both copies
+    # read the downloaded file and write to different filesystems
     if model_path:
-        import shutil
         output_path = Path("/root/console_textured.glb")
-        shutil.copy(model_path, output_path)
-        
-        size_mb = output_path.stat().st_size / (1024 * 1024)
-        print(f"\n[OK] Model saved: {output_path} ({size_mb:.2f} MB)")
-        print(f"✅ Model includes UV-unwrapped textures!")
-        
-        # Copy to Windows
-        import subprocess
-        subprocess.run([
-            "cp", str(output_path),
-            "/mnt/c/GIT/progship/progship-core/output/console_textured.glb"
-        ])
-        print(f"✅ Copied to Windows output directory")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            local_copy = executor.submit(shutil.copy, model_path, output_path)
+            windows_copy = executor.submit(
+                shutil.copyfile, model_path,
+                "/mnt/c/GIT/progship/progship-core/output/console_textured.glb"
+            )
+            local_copy.result()
+            
+            size_mb = output_path.stat().st_size / (1024 * 1024)
+            print(f"\n[OK] Model saved: {output_path} ({size_mb:.2f} MB)")
+            print(f"✅ Model includes UV-unwrapped textures!")
+            
+            windows_copy.result()
+            print(f"✅ Copied to Windows output directory")
         
 except Exception as e:
     print(f"[ERROR] {type(e).__name__}: {e}")
@@ -3,6 +3,7 @@
 import sys
 sys.path.insert(0, "/root/TripoSR")
 
+import argparse
 import torch
 from PIL import Image
 from pathlib import Path
@@ -10,6 +11,14 @@ import time
 from tsr.system import TSR
 from tsr.utils import remove_background, resize_foreground
 
+DTYPES = {"bf16": torch.bfloat16, "fp16": torch.float16, "fp32": torch.float32}
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--dtype", choices=DTYPES, default="bf16",
+                    help="Autocast dtype for the scene-code forward (fp32 for A/B quality checks)")
+args = parser.parse_args()
+dtype = DTYPES[args.dtype]
+
 print("=" * 80)
 print("TripoSR Test: Command Console (with textures)")
 print("=" * 80)
@@ -21,9 +30,10 @@ model = TSR.from_pretrained(
     config_name="config.yaml",
     weight_name="model.ckpt",
 )
-model.renderer.set_chunk_size(8192)
+# Half-precision activations leave room for twice the renderer chunk size
+model.renderer.set_chunk_size(8192 if dtype == torch.float32 else 16384)
 model.to("cuda")
-print("[OK] Model loaded on GPU")
+print(f"[OK] Model loaded on GPU ({args.dtype})")
 
 # Load and preprocess image
 image_path = "/mnt/c/GIT/progship/progship-core/output/images_regenerated/command_console/command_console_main.png"
@@ -43,8 +53,10 @@ print("This should take 3-5 seconds...")
 
 start = time.time()
 with torch.no_grad():
-    scene_codes = model([image], device="cuda")
-    meshes = model.extract_mesh(scene_codes)
+    with torch.autocast("cuda", dtype=dtype, enabled=dtype != torch.float32):
+        scene_codes = model([image], device="cuda")
+    # Marching cubes runs on FP32 densities, so mesh extraction stays outside autocast
+    meshes = model.extract_mesh(scene_codes.float())
 elapsed = time.time() - start
 
 print(f"[OK] Generation complete in {elapsed:.1f}s")
@@ -66,12 +78,9 @@ if output_path.exists():
     print(f"Textures: {'✅ Yes' if has_textures else '❌ No'}")
     print(f"Vertex colors: {'✅ Yes' if has_vertex_colors else '❌ No'}")
     
-    # Copy to Windows
-    import subprocess
-    subprocess.run([
-        "cp", str(output_path),
-        "/mnt/c/GIT/progship/progship-core/output/console_triposr.glb"
-    ])
+    # Copy to Windows (copyfile uses sendfile/copy_file_range in-kernel, no cp fork)
+    import shutil
+    shutil.copyfile(output_path, "/mnt/c/GIT/progship/progship-core/output/console_triposr.glb")
     print(f"\n✅ Copied to Windows: output/console_triposr.glb")
 
 print("\n" + "=" * 80)
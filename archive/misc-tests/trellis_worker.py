@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Long-running TRELLIS worker.
+
+Loads TrellisImageTo3DPipeline once and keeps it resident on the GPU, serving
+image-to-3D jobs over a local socket so batch scripts don't pay the 30-60s
+model load on every run.
+
+Usage:
+    python trellis_worker.py          # start the worker (Ctrl+C to stop)
+
+Clients connect with multiprocessing.connection.Client(WORKER_ADDRESS,
+authkey=WORKER_AUTHKEY), send (image, seed) tuples and receive either
+("ok", vertices, faces) or ("error", message).
+"""
+import os
+os.environ.setdefault("ATTN_BACKEND", "xformers")
+os.environ.setdefault("SPCONV_ALGO", "native")
+
+import sys
+sys.path.insert(0, "/root/TRELLIS")
+
+from multiprocessing.connection import Listener
+
+WORKER_ADDRESS = ("localhost", 6123)
+WORKER_AUTHKEY = b"progship-trellis"
+
+
+def meshes_to_host(meshes):
+    """
+    Copy TRELLIS meshes' vertices and faces to host numpy arrays.
+
+    All copies are queued asynchronously into pinned buffers and waited on
+    with a single stream sync, instead of two blocking .cpu() round-trips
+    per mesh. Buffers are fresh per mesh because callers hand the arrays to
+    other threads/processes that may still be reading them.
+    """
+    import torch
+
+    host = []
+    for mesh in meshes:
+        vertices = torch.empty(mesh.vertices.shape, dtype=mesh.vertices.dtype, pin_memory=True)
+        faces = torch.empty(mesh.faces.shape, dtype=mesh.faces.dtype, pin_memory=True)
+        vertices.copy_(mesh.vertices, non_blocking=True)
+        faces.copy_(mesh.faces, non_blocking=True)
+        host.append((vertices, faces))
+    torch.cuda.current_stream().synchronize()
+    return [(vertices.numpy(), faces.numpy()) for vertices, faces in host]
+
+
+def mesh_to_host(mesh):
+    """Copy one TRELLIS mesh to host (vertices, faces) numpy arrays."""
+    return meshes_to_host([mesh])[0]
+
+
+def serve(pipeline, conn):
+    """Run jobs from a single client until it disconnects."""
+    while True:
+        try:
+            image, seed = conn.recv()
+        except EOFError:
+            return
+        try:
+            outputs = pipeline.run(image, seed=seed)
+            vertices, faces = mesh_to_host(outputs['mesh'][0])
+            conn.send(("ok", vertices, faces))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+def main():
+    from trellis.pipelines import TrellisImageTo3DPipeline
+
+    print("=" * 80)
+    print("TRELLIS WORKER")
+    print("=" * 80)
+    pipeline = TrellisImageTo3DPipeline.from_pretrained("microsoft/TRELLIS-image-large")
+    pipeline.cuda()
+    print("[OK] Pipeline loaded on GPU")
+
+    with Listener(WORKER_ADDRESS, authkey=WORKER_AUTHKEY) as listener:
+        print(f"[OK] Listening on {WORKER_ADDRESS[0]}:{WORKER_ADDRESS[1]}")
+        while True:
+            with listener.accept() as conn:
+                print(f"[CONNECT] {listener.last_accepted}")
+                serve(pipeline, conn)
+                print(f"[DISCONNECT] {listener.last_accepted}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n[OK] Worker stopped")
@@ -5,6 +5,7 @@ Usage:
     progship generate --ship-type colony_stacked --style ceramic_white
     progship describe output/structure.json
     progship validate
+    progship compile-schemas
 """
 
 import json
@@ -12,10 +13,10 @@ import click
 from pathlib import Path
 from progship.data.loader import get_loader
 from progship.data.validator import SchemaValidator
-from progship.data.models import ShipStructure
-from progship.generation.architect import ShipArchitect
-from progship.generation.interior import InteriorGenerator
-from progship.pipeline import DescriptionGenerator
+
+# Generation and pipeline modules are imported inside the commands that use
+# them: progship.pipeline pulls in torch/diffusers, which would otherwise
+# dominate startup of quick commands like list-styles or validate.
 
 
 @click.group()
@@ -35,41 +36,39 @@ def cli():
 @click.option('--with-images', is_flag=True, help='Generate concept art (Stage 3)')
 @click.option('--process-images', is_flag=True, help='Post-process images (crop, thumbnails)')
 @click.option('--no-cache', is_flag=True, help='Disable description caching')
+@click.option('--semantic-cache', is_flag=True,
+              help='Reuse cached descriptions for near-identical prompts')
 @click.option('--image-resolution', default=1024, type=int, help='Image resolution (default: 1024)')
 @click.option('--image-steps', default=25, type=int, help='Image inference steps (default: 25)')
 def generate(ship_type: str, style: str, rooms: int, seed: int, output: str, 
              with_descriptions: bool, with_images: bool, process_images: bool, no_cache: bool,
-             image_resolution: int, image_steps: int):
+             semantic_cache: bool, image_resolution: int, image_steps: int):
     """Generate ship structure (Stage 1) and optionally descriptions (Stage 2)."""
+    from progship.generation.architect import ShipArchitect
+    from progship.generation.interior import InteriorGenerator
+    
     click.echo(f"🚀 Generating {ship_type} ship with {style} style...")
     
     loader = get_loader()
+    loader.preload_all()
     architect = ShipArchitect(loader)
     interior_gen = InteriorGenerator(loader)
     
-    # Generate structure (Stage 1)
+    # Generate structure (Stage 1), populating rooms with facilities as they are placed
     structure = architect.generate_structure(
         ship_type_id=ship_type,
         style_id=style,
         room_count=rooms,
-        seed=seed
+        seed=seed,
+        interior_gen=interior_gen
     )
     
-    # Populate rooms with facilities
-    for placed_room in structure.rooms:
-        facilities = interior_gen.populate_room(
-            room_id=placed_room.room_id,
-            style_id=style,
-            seed=seed
-        )
-        placed_room.facilities = facilities
-    
     # Save structure to JSON
     output_path = Path(output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(structure.model_dump(), f, indent=2)
+    # Serialise in pydantic-core, skipping the intermediate model_dump() dict
+    output_path.write_bytes(structure.model_dump_json(indent=2).encode('utf-8'))
     
     click.echo(f"✓ Generated structure saved to: {output_path}")
     click.echo(f"  Rooms: {len(structure.rooms)}")
@@ -81,7 +80,7 @@ def generate(ship_type: str, style: str, rooms: int, seed: int, output: str,
     if with_descriptions or with_images:
         click.echo("\n🎨 Generating AI descriptions (Stage 2)...")
         from progship.pipeline import DescriptionGenerator
-        desc_generator = DescriptionGenerator()
+        desc_generator = DescriptionGenerator(semantic_cache=semantic_cache)
         
         manifest = desc_generator.generate_descriptions(
             structure,
@@ -139,8 +138,13 @@ def generate(ship_type: str, style: str, rooms: int, seed: int, output: str,
 @click.argument('structure_file', type=click.Path(exists=True))
 @click.option('--output', default=None, help='Output file path (default: <structure>_descriptions.json)')
 @click.option('--no-cache', is_flag=True, help='Disable description caching')
-def describe(structure_file: str, output: str, no_cache: bool):
+@click.option('--semantic-cache', is_flag=True,
+              help='Reuse cached descriptions for near-identical prompts')
+def describe(structure_file: str, output: str, no_cache: bool, semantic_cache: bool):
     """Generate AI descriptions for an existing structure file (Stage 2)."""
+    from progship.data.models import ShipStructure
+    from progship.pipeline import DescriptionGenerator
+    
     click.echo(f"🎨 Generating descriptions for {structure_file}...")
     
     # Load structure
@@ -149,7 +153,7 @@ def describe(structure_file: str, output: str, no_cache: bool):
         structure = ShipStructure(**structure_data)
     
     # Generate descriptions
-    desc_generator = DescriptionGenerator()
+    desc_generator = DescriptionGenerator(semantic_cache=semantic_cache)
     manifest = desc_generator.generate_descriptions(
         structure,
         use_cache=not no_cache
@@ -201,6 +205,16 @@ def validate():
         raise click.ClickException("Validation failed")
 
 
+@cli.command('compile-schemas')
+def compile_schemas_cmd():
+    """Pre-compile JSON schemas to Python validator modules."""
+    from progship.data.validator import compile_schemas
+    
+    click.echo("⚙️  Compiling schemas...")
+    for module_path in compile_schemas():
+        click.echo(f"  ✓ {module_path.name}")
+
+
 @cli.command()
 def list_ship_types():
     """List available ship types."""
@@ -257,9 +271,19 @@ def list_facilities():
 @click.option('--angles', is_flag=True, help='Generate multiple camera angles')
 @click.option('--negative', default=None, help='Negative prompt')
 @click.option('--process', is_flag=True, help='Auto-process images (crop, thumbnails)')
+@click.option('--quantize', type=click.Choice(['none', 'int8', 'fp8']), default='none',
+              help='Quantize transformer and T5 weights to 8 bits '
+                   '(~half their VRAM; see list-models)')
+@click.option('--cuda-graphs', is_flag=True,
+              help='Keep the model on GPU and replay denoise steps as CUDA graphs (no CPU offload)')
 def generate_images_cmd(descriptions_file: str, output: str, model: str, resolution: int, 
-                        steps: int, angles: bool, negative: str, process: bool):
-    """Generate concept art images from descriptions (Stage 3)."""
+                        steps: int, angles: bool, negative: str, process: bool, quantize: str,
+                        cuda_graphs: bool):
+    """Generate concept art images from descriptions (Stage 3).
+    
+    Uses PYTORCH_CUDA_ALLOC_CONF=expandable_segments:True,max_split_size_mb=512
+    unless PYTORCH_CUDA_ALLOC_CONF is already set.
+    """
     from progship.pipeline import ImagePipeline, batch_process_images, get_model_info
     
     # Show model info
@@ -271,6 +295,8 @@ def generate_images_cmd(descriptions_file: str, output: str, model: str, resolut
     # Create pipeline with selected model
     pipeline = ImagePipeline(
         model_type=model,
+        quantize=quantize,
+        cuda_graphs=cuda_graphs,
         resolution=resolution,
         num_inference_steps=steps
     )
@@ -304,26 +330,13 @@ def generate_images_cmd(descriptions_file: str, output: str, model: str, resolut
         click.echo(f"✓ Processed {results['total_processed']} images")
         if results['issues_found'] > 0:
             click.echo(f"⚠️  {results['issues_found']} images had quality issues")
-    
-    # Post-process images if requested
-    if process:
-        click.echo("\n🔧 Post-processing images...")
-        results = batch_process_images(
-            output_path,
-            auto_crop=True,
-            generate_thumbnails=True,
-            validate=True
-        )
-        
-        click.echo(f"✓ Processed {results['total_processed']} images")
-        if results['issues_found'] > 0:
-            click.echo(f"⚠️  {results['issues_found']} images had quality issues")
 
 
 @cli.command('list-models')
 def list_models_cmd():
     """List available image generation models."""
     from progship.pipeline import list_available_models
+    from progship.pipeline.model_registry import QUANTIZABLE_MODELS
     
     click.echo("Available Image Generation Models:")
     click.echo("=" * 80)
@@ -334,6 +347,9 @@ def list_models_cmd():
         click.echo(f"  Resolution: {info.native_resolution}px (native), up to {info.max_resolution}px")
         click.echo(f"  Quality: {info.quality_tier}")
         click.echo(f"  VRAM: {info.vram_required}GB required")
+        if model_type in QUANTIZABLE_MODELS:
+            click.echo("  Quantization: --quantize int8/fp8 stores transformer and T5 weights "
+                       "in 8 bits (~half their VRAM)")
         click.echo(f"  Negative prompts: {'Yes' if info.supports_negative_prompts else 'No'}")
         click.echo(f"  Description: {info.description}")
 
@@ -344,8 +360,12 @@ def list_models_cmd():
 @click.option('--no-crop', is_flag=True, help='Skip auto-cropping')
 @click.option('--no-thumbs', is_flag=True, help='Skip thumbnail generation')
 @click.option('--no-validate', is_flag=True, help='Skip quality validation')
+@click.option('--workers', default=None, type=int,
+              help='Images processed in parallel (default: CPU count)')
+@click.option('--optimize-png', is_flag=True,
+              help='Smallest main PNGs for final deliverables (much slower to write)')
 def process_images_cmd(image_manifest: str, output_dir: str, no_crop: bool, 
-                       no_thumbs: bool, no_validate: bool):
+                       no_thumbs: bool, no_validate: bool, workers: int, optimize_png: bool):
     """Post-process images (crop, resize, thumbnails, validation)."""
     from progship.pipeline import batch_process_images
     
@@ -354,9 +374,11 @@ def process_images_cmd(image_manifest: str, output_dir: str, no_crop: bool,
     results = batch_process_images(
         Path(image_manifest),
         Path(output_dir),
+        workers=workers,
         auto_crop=not no_crop,
         generate_thumbnails=not no_thumbs,
-        validate=not no_validate
+        validate=not no_validate,
+        optimize_png=optimize_png
     )
     
     click.echo(f"\n✓ Batch processing complete!")
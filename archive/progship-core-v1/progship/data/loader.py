@@ -2,31 +2,55 @@
 Database loader for ProgShip JSON data files.
 
 Loads ship types, styles, facilities, and rooms with validation.
+Set PROGSHIP_CACHE=1 to reuse a pickled copy of all databases between runs, and
+PROGSHIP_TRUSTED_DATA=1 to skip pydantic validation of already-validated data files.
 """
 
+import functools
+import hashlib
 import json
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Type
 from progship.data.models import (
     ShipTypeDatabase, StyleDatabase, FacilityDatabase, RoomDatabase,
     StructuralDatabase, LightDatabase,
-    ShipType, StyleDescriptor, Facility, Room, StructuralElement, LightFixture
+    ShipType, StyleDescriptor, Facility, Room, StructuralElement, LightFixture,
+    ModelT, construct_trusted
 )
 
 
+@functools.lru_cache(maxsize=None)
+def _model_code_version() -> str:
+    """Package version plus a hash of the model sources pickled objects depend on."""
+    from progship import __version__
+    import progship.data.models as models
+    import progship.data.models_fast as models_fast
+    
+    digest = hashlib.blake2b(digest_size=16)
+    for module in (models, models_fast):
+        digest.update(Path(module.__file__).read_bytes())
+    return f"{__version__}-{digest.hexdigest()}"
+
+
 class DatabaseLoader:
     """Loads and caches JSON databases."""
     
-    def __init__(self, data_dir: Optional[Path] = None):
+    def __init__(self, data_dir: Optional[Path] = None, trusted: bool = False):
         """
         Initialize loader.
         
         Args:
             data_dir: Path to data directory. Defaults to progship-core/data/
+            trusted: Build models with model_construct() instead of validating them.
+                Only for data files that already pass `progship validate`.
         """
         if data_dir is None:
             data_dir = Path(__file__).parent.parent.parent / "data"
         self.data_dir = Path(data_dir)
+        self.trusted = trusted
         
         # Caches
         self._ship_types: Optional[ShipTypeDatabase] = None
@@ -35,118 +59,209 @@ class DatabaseLoader:
         self._rooms: Optional[RoomDatabase] = None
         self._structural: Optional[StructuralDatabase] = None
         self._lights: Optional[LightDatabase] = None
+        
+        # Opt-in compiled cache: all databases pickled in one file, keyed by
+        # the names and mtimes of the source JSON files
+        if os.environ.get("PROGSHIP_CACHE") == "1":
+            self._load_compiled()
+    
+    def _compiled_path(self) -> Path:
+        """Path of the compiled cache for the current data files and code.
+        
+        The key covers each data file's name and mtime, the model code that
+        pickled objects are instances of, and whether validation was skipped,
+        so a cache built any other way is never loaded.
+        """
+        parts = [_model_code_version(), f"trusted={self.trusted}"]
+        parts += [
+            f"{p.name}\0{p.stat().st_mtime_ns}" for p in sorted(self.data_dir.glob("*.json"))
+        ]
+        digest = hashlib.blake2b("\n".join(parts).encode(), digest_size=16).hexdigest()
+        return self.data_dir / f"_compiled_{digest}.pkl"
+    
+    def _load_compiled(self):
+        """Populate all caches from the compiled cache, building it on a miss."""
+        path = self._compiled_path()
+        if path.exists():
+            try:
+                with open(path, 'rb') as f:
+                    (self._ship_types, self._styles, self._facilities,
+                     self._rooms, self._structural, self._lights) = pickle.load(f)
+                return
+            except (pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError) as e:
+                print(f"⚠ Warning: Corrupted compiled cache {path}, rebuilding: {e}")
+        
+        self.preload_all()
+        
+        # Drop caches compiled from older versions of the data files
+        for stale in self.data_dir.glob("_compiled_*.pkl"):
+            stale.unlink(missing_ok=True)
+        try:
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(
+                    (self._ship_types, self._styles, self._facilities,
+                     self._rooms, self._structural, self._lights),
+                    f, protocol=pickle.HIGHEST_PROTOCOL
+                )
+            os.replace(tmp_path, path)
+        except IOError as e:
+            print(f"⚠ Warning: Failed to write compiled cache {path}: {e}")
+    
+    def _parse(self, model_cls: Type[ModelT], path: Path) -> ModelT:
+        """Parse a database file, skipping validation when the data is trusted."""
+        if self.trusted:
+            return construct_trusted(model_cls, json.loads(path.read_bytes()))
+        # model_validate_json parses and validates in one pass inside pydantic-core,
+        # with no intermediate Python dicts
+        return model_cls.model_validate_json(path.read_bytes())
+    
+    # ID indexes, built on first lookup and dropped when the database reloads
+    _INDEXES = (
+        '_ship_type_index', '_style_index', '_facility_index',
+        '_room_index', '_structural_index', '_light_index',
+    )
+    
+    @functools.cached_property
+    def _ship_type_index(self) -> Dict[str, ShipType]:
+        return {s.id: s for s in self.load_ship_types().ship_types}
+    
+    @functools.cached_property
+    def _style_index(self) -> Dict[str, StyleDescriptor]:
+        return {s.id: s for s in self.load_styles().style_descriptors}
+    
+    @functools.cached_property
+    def _facility_index(self) -> Dict[str, Facility]:
+        return {f.id: f for f in self.load_facilities().facilities}
+    
+    @functools.cached_property
+    def _room_index(self) -> Dict[str, Room]:
+        return {r.id: r for r in self.load_rooms().rooms}
+    
+    @functools.cached_property
+    def _structural_index(self) -> Dict[str, StructuralElement]:
+        return {e.id: e for e in self.load_structural_elements().elements}
+    
+    @functools.cached_property
+    def _light_index(self) -> Dict[str, LightFixture]:
+        return {f.id: f for f in self.load_light_fixtures().fixtures}
     
     def load_ship_types(self, force_reload: bool = False) -> ShipTypeDatabase:
         """Load ship types database."""
         if self._ship_types is None or force_reload:
+            self.__dict__.pop('_ship_type_index', None)
             path = self.data_dir / "ship_types.json"
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            self._ship_types = ShipTypeDatabase(**data)
+            self._ship_types = self._parse(ShipTypeDatabase, path)
         return self._ship_types
     
     def load_styles(self, force_reload: bool = False) -> StyleDatabase:
         """Load style descriptors database."""
         if self._styles is None or force_reload:
+            self.__dict__.pop('_style_index', None)
             path = self.data_dir / "style_descriptors.json"
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            self._styles = StyleDatabase(**data)
+            self._styles = self._parse(StyleDatabase, path)
         return self._styles
     
     def load_facilities(self, force_reload: bool = False) -> FacilityDatabase:
         """Load facilities database."""
         if self._facilities is None or force_reload:
+            self.__dict__.pop('_facility_index', None)
             path = self.data_dir / "facilities.json"
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            self._facilities = FacilityDatabase(**data)
+            self._facilities = self._parse(FacilityDatabase, path)
         return self._facilities
     
     def load_rooms(self, force_reload: bool = False) -> RoomDatabase:
         """Load rooms database (if exists)."""
         if self._rooms is None or force_reload:
+            self.__dict__.pop('_room_index', None)
             path = self.data_dir / "rooms.json"
             if not path.exists():
                 # Return empty database if file doesn't exist yet
                 self._rooms = RoomDatabase(rooms=[])
             else:
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                self._rooms = RoomDatabase(**data)
+                self._rooms = self._parse(RoomDatabase, path)
         return self._rooms
     
     def get_ship_type(self, ship_type_id: str) -> Optional[ShipType]:
         """Get a specific ship type by ID."""
-        db = self.load_ship_types()
-        for ship_type in db.ship_types:
-            if ship_type.id == ship_type_id:
-                return ship_type
-        return None
+        return self._ship_type_index.get(ship_type_id)
     
     def get_style(self, style_id: str) -> Optional[StyleDescriptor]:
         """Get a specific style by ID."""
-        db = self.load_styles()
-        for style in db.style_descriptors:
-            if style.id == style_id:
-                return style
-        return None
+        return self._style_index.get(style_id)
     
     def get_facility(self, facility_id: str) -> Optional[Facility]:
         """Get a specific facility by ID."""
-        db = self.load_facilities()
-        for facility in db.facilities:
-            if facility.id == facility_id:
-                return facility
-        return None
+        return self._facility_index.get(facility_id)
     
     def get_room(self, room_id: str) -> Optional[Room]:
         """Get a specific room by ID."""
-        db = self.load_rooms()
-        for room in db.rooms:
-            if room.id == room_id:
-                return room
-        return None
+        return self._room_index.get(room_id)
     
     def load_structural_elements(self, force_reload: bool = False) -> StructuralDatabase:
         """Load structural elements database."""
         if self._structural is None or force_reload:
+            self.__dict__.pop('_structural_index', None)
             path = self.data_dir / "structural_elements.json"
             if not path.exists():
                 self._structural = StructuralDatabase(elements=[])
             else:
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                self._structural = StructuralDatabase(**data)
+                self._structural = self._parse(StructuralDatabase, path)
         return self._structural
     
     def load_light_fixtures(self, force_reload: bool = False) -> LightDatabase:
         """Load light fixtures database."""
         if self._lights is None or force_reload:
+            self.__dict__.pop('_light_index', None)
             path = self.data_dir / "light_fixtures.json"
             if not path.exists():
                 self._lights = LightDatabase(fixtures=[])
             else:
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                self._lights = LightDatabase(**data)
+                self._lights = self._parse(LightDatabase, path)
         return self._lights
     
+    def preload_all(self):
+        """
+        Load every database concurrently.
+        
+        The six files are independent, so reading them in a thread pool
+        overlaps their file I/O instead of paying for it one file at a time.
+        """
+        loaders = [
+            self.load_ship_types, self.load_styles, self.load_facilities,
+            self.load_rooms, self.load_structural_elements, self.load_light_fixtures,
+        ]
+        with ThreadPoolExecutor(max_workers=len(loaders)) as executor:
+            futures = [executor.submit(load) for load in loaders]
+            for future in futures:
+                future.result()
+    
+    def invalidate(self):
+        """
+        Drop every loaded database and ID index.
+        
+        For hot-reload after the data files change: the next lookup re-reads
+        the files it needs (and with PROGSHIP_CACHE=1, recompiles the cache).
+        """
+        self._ship_types = None
+        self._styles = None
+        self._facilities = None
+        self._rooms = None
+        self._structural = None
+        self._lights = None
+        for index in self._INDEXES:
+            self.__dict__.pop(index, None)
+        
+        if os.environ.get("PROGSHIP_CACHE") == "1":
+            self._load_compiled()
+    
     def get_structural_element(self, element_id: str) -> Optional[StructuralElement]:
         """Get a specific structural element by ID."""
-        db = self.load_structural_elements()
-        for element in db.elements:
-            if element.id == element_id:
-                return element
-        return None
+        return self._structural_index.get(element_id)
     
     def get_light_fixture(self, fixture_id: str) -> Optional[LightFixture]:
         """Get a specific light fixture by ID."""
-        db = self.load_light_fixtures()
-        for fixture in db.fixtures:
-            if fixture.id == fixture_id:
-                return fixture
-        return None
+        return self._light_index.get(fixture_id)
 
 
 # Singleton instance
@@ -156,5 +271,5 @@ def get_loader() -> DatabaseLoader:
     """Get singleton database loader instance."""
     global _loader
     if _loader is None:
-        _loader = DatabaseLoader()
+        _loader = DatabaseLoader(trusted=os.environ.get("PROGSHIP_TRUSTED_DATA") == "1")
     return _loader
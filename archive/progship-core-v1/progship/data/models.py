@@ -4,15 +4,27 @@ Data models for ProgShip using Pydantic for validation.
 Represents ship types, styles, facilities, rooms, and generated structures.
 """
 
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, field_validator
+from functools import cached_property
+from typing import (
+    Annotated, List, NamedTuple, Optional, Dict, Any, Type, TypeVar, Union, get_args, get_origin
+)
+from pydantic import (
+    BaseModel, ConfigDict, Field, StringConstraints, field_serializer, field_validator
+)
+from progship.data.models_fast import build_variant_index
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+# Database IDs: lowercase snake_case. One shared annotation, so every model
+# reuses the same constrained-string schema instead of declaring its own.
+ID_STR = Annotated[str, StringConstraints(pattern=r"^[a-z_]+$")]
 
 
 # === Ship Types & Styles ===
 
 class ShipType(BaseModel):
     """Ship archetype definition."""
-    id: str = Field(pattern=r"^[a-z_]+$")
+    id: ID_STR
     name: str
     construction_type: str
     default_style: str
@@ -23,7 +35,7 @@ class ShipType(BaseModel):
 
 class StyleDescriptor(BaseModel):
     """Visual style palette."""
-    id: str = Field(pattern=r"^[a-z_]+$")
+    id: ID_STR
     name: str
     material_palette: List[str]
     color_palette: List[str]
@@ -49,19 +61,39 @@ class AttachmentPoint(BaseModel):
     type: str
 
 
-# === Structural Elements (Walls, Floors, Doors) ===
+# === Variants ===
 
-class StructuralVariant(BaseModel):
-    """Style-specific variation of a structural element."""
-    id: str = Field(pattern=r"^[a-z_]+$")
+class HasVariants(BaseModel):
+    """Base for definitions with style-specific `variants`."""
+    model_config = ConfigDict(ignored_types=(cached_property,))
+    
+    @cached_property
+    def _variant_index(self) -> Dict[str, BaseModel]:
+        return build_variant_index(self.variants)
+    
+    def get_variant(self, style_id: str) -> Optional[BaseModel]:
+        """Get variant matching a style ID."""
+        return self._variant_index.get(style_id)
+
+
+class Variant(BaseModel):
+    """Style-specific variation of a structural element or facility."""
+    id: ID_STR
     style_tags: List[str]
     description_override: Optional[str] = None
     model_hints: Optional[Dict[str, Any]] = None
 
 
-class StructuralElement(BaseModel):
+# Structural elements and facilities share one variant shape (and one schema)
+StructuralVariant = Variant
+FacilityVariant = Variant
+
+
+# === Structural Elements (Walls, Floors, Doors) ===
+
+class StructuralElement(HasVariants):
     """Physical structure components (walls, floors, ceilings, doors)."""
-    id: str = Field(pattern=r"^[a-z_]+$")
+    id: ID_STR
     name: str
     type: str  # "wall", "floor", "ceiling", "door", "corridor"
     category: str  # "structural", "passage"
@@ -76,29 +108,22 @@ class StructuralElement(BaseModel):
     
     # Corridor-specific properties
     corridor_width: Optional[float] = None
-    
-    def get_variant(self, style_id: str) -> Optional[StructuralVariant]:
-        """Get variant matching a style ID."""
-        for variant in self.variants:
-            if style_id in variant.style_tags or variant.id == style_id:
-                return variant
-        return None
 
 
 # === Lighting ===
 
 class LightVariant(BaseModel):
     """Style-specific variation of a light fixture."""
-    id: str = Field(pattern=r"^[a-z_]+$")
+    id: ID_STR
     style_tags: List[str]
     description_override: Optional[str] = None
     intensity_multiplier: float = 1.0
     color_override: Optional[List[float]] = None  # RGB
 
 
-class LightFixture(BaseModel):
+class LightFixture(HasVariants):
     """Light fixture definition (both geometry and illumination)."""
-    id: str = Field(pattern=r"^[a-z_]+$")
+    id: ID_STR
     name: str
     type: str  # "ambient", "point", "spot", "area", "panel"
     base_description: str
@@ -107,26 +132,11 @@ class LightFixture(BaseModel):
     range: float = 10.0
     bounding_box: Optional[BoundingBox] = None  # for fixtures with geometry
     variants: List[LightVariant] = []
-    
-    def get_variant(self, style_id: str) -> Optional[LightVariant]:
-        """Get variant matching a style ID."""
-        for variant in self.variants:
-            if style_id in variant.style_tags or variant.id == style_id:
-                return variant
-        return None
-
-
-class FacilityVariant(BaseModel):
-    """Style-specific variation of a facility."""
-    id: str = Field(pattern=r"^[a-z_]+$")
-    style_tags: List[str]
-    description_override: Optional[str] = None
-    model_hints: Optional[Dict[str, Any]] = None
 
 
-class Facility(BaseModel):
+class Facility(HasVariants):
     """Component definition with variants."""
-    id: str = Field(pattern=r"^[a-z_]+$")
+    id: ID_STR
     name: str
     category: str
     base_description: str
@@ -134,17 +144,17 @@ class Facility(BaseModel):
     attachment_points: List[AttachmentPoint] = []
     spatial_constraints: List[str] = []
     variants: List[FacilityVariant] = []
-    
-    def get_variant(self, style_id: str) -> Optional[FacilityVariant]:
-        """Get variant matching a style ID."""
-        for variant in self.variants:
-            if style_id in variant.style_tags or variant.id == style_id:
-                return variant
-        return None
 
 
 # === Rooms ===
 
+class Dims(NamedTuple):
+    """Room extents in meters."""
+    width: float
+    height: float
+    depth: float
+
+
 class DoorPlacement(BaseModel):
     """Door location on a room wall."""
     wall_side: str  # "north", "south", "east", "west"
@@ -175,14 +185,25 @@ class RoomGeometry(BaseModel):
 
 class Room(BaseModel):
     """Room template definition."""
-    id: str = Field(pattern=r"^[a-z_]+$")
+    id: ID_STR
     name: str
-    dimensions: Dict[str, float]  # width, height, depth (legacy, kept for compatibility)
+    dimensions: Dims  # width, height, depth (legacy, kept for compatibility)
     geometry: Optional[RoomGeometry] = None  # NEW: detailed geometry
     characteristic_facilities: List[str] = []
     characteristic_lights: List[str] = []  # NEW: typical light fixtures for this room
     spatial_constraints: List[str] = []
     description: Optional[str] = None
+    
+    @field_validator('dimensions', mode='before')
+    @classmethod
+    def _coerce_dimensions(cls, v: Any) -> Any:
+        """Accept the {"width", "height", "depth"} objects used in rooms.json."""
+        return Dims(**v) if isinstance(v, dict) else v
+    
+    @field_serializer('dimensions')
+    def _dump_dimensions(self, v: Dims) -> Dict[str, float]:
+        """Keep the object form in JSON rather than a bare array."""
+        return v._asdict()
 
 
 # === Generated Structure ===
@@ -263,6 +284,7 @@ class ComponentDescription(BaseModel):
 
 class DescriptionManifest(BaseModel):
     """Manifest of all generated descriptions for a ship."""
+    model_config = ConfigDict(defer_build=True)
     
     ship_type_id: str
     style_id: str
@@ -273,32 +295,90 @@ class DescriptionManifest(BaseModel):
 
 
 # === Database Collections ===
+# Each collection is validated once per data file, so its schema is built on
+# first use rather than at import time (defer_build).
 
 class StructuralDatabase(BaseModel):
     """Collection of structural elements."""
+    model_config = ConfigDict(defer_build=True)
+    
     elements: List[StructuralElement]
 
 
 class LightDatabase(BaseModel):
     """Collection of light fixtures."""
+    model_config = ConfigDict(defer_build=True)
+    
     fixtures: List[LightFixture]
 
 
 class ShipTypeDatabase(BaseModel):
     """Collection of ship types."""
+    model_config = ConfigDict(defer_build=True)
+    
     ship_types: List[ShipType]
 
 
 class StyleDatabase(BaseModel):
     """Collection of style descriptors."""
+    model_config = ConfigDict(defer_build=True)
+    
     style_descriptors: List[StyleDescriptor]
 
 
 class FacilityDatabase(BaseModel):
     """Collection of facilities."""
+    model_config = ConfigDict(defer_build=True)
+    
     facilities: List[Facility]
 
 
 class RoomDatabase(BaseModel):
     """Collection of room templates."""
+    model_config = ConfigDict(defer_build=True)
+    
     rooms: List[Room]
+
+
+# === Trusted Construction ===
+
+def _construct_value(annotation: Any, value: Any) -> Any:
+    """Build nested models inside a field value without validating it."""
+    if value is None:
+        return None
+    origin = get_origin(annotation)
+    if origin is Union:
+        for arg in get_args(annotation):
+            if arg is not type(None):
+                return _construct_value(arg, value)
+    if origin is list:
+        (item_type,) = get_args(annotation) or (Any,)
+        return [_construct_value(item_type, item) for item in value]
+    if isinstance(annotation, type) and isinstance(value, dict):
+        if issubclass(annotation, BaseModel):
+            return construct_trusted(annotation, value)
+        if issubclass(annotation, tuple) and hasattr(annotation, '_fields'):
+            return annotation(**value)
+    return value
+
+
+def construct_trusted(model_cls: Type[ModelT], data: Dict[str, Any]) -> ModelT:
+    """
+    Build a model (and its nested models) from already-validated data.
+    
+    Uses model_construct() recursively, skipping pydantic validation entirely;
+    only use it for data that has already passed schema validation.
+    
+    Args:
+        model_cls: Model class to build
+        data: Parsed JSON object
+        
+    Returns:
+        Model instance with defaults filled in for missing fields
+    """
+    values = {}
+    for name, field in model_cls.model_fields.items():
+        key = field.alias or name
+        if key in data:
+            values[name] = _construct_value(field.annotation, data[key])
+    return model_cls.model_construct(**values)
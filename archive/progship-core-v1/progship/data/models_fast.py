@@ -0,0 +1,32 @@
+"""
+Typed helpers for hot lookups on the data models.
+
+Kept free of pydantic so mypyc can compile it to a C extension
+(PROGSHIP_MYPYC=1 at install time, see setup.py); as plain Python it
+behaves identically.
+"""
+
+from typing import Any, Dict, List
+
+
+def build_variant_index(variants: List[Any]) -> Dict[str, Any]:
+    """
+    Map variant IDs and style tags to variants.
+    
+    setdefault keeps the first match, so lookups agree with an in-order
+    scan over `variants`.
+    
+    Args:
+        variants: Variant models, each with `id` and `style_tags`
+        
+    Returns:
+        Dict from style tag or variant ID to variant
+    """
+    index: Dict[str, Any] = {}
+    for variant in variants:
+        tags: List[str] = variant.style_tags
+        for tag in tags:
+            index.setdefault(tag, variant)
+        variant_id: str = variant.id
+        index.setdefault(variant_id, variant)
+    return index
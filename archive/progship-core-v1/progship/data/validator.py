@@ -4,11 +4,82 @@ JSON Schema Validator for ProgShip data files.
 Validates ship types, style descriptors, facilities, and rooms against their schemas.
 """
 
+import hashlib
+import importlib
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
-import jsonschema
-from jsonschema import validate, ValidationError
+from typing import Dict, Any, Callable, List, Tuple
+import fastjsonschema
+
+try:
+    import orjson
+
+    def _read_json(path: Path) -> Any:
+        """Parse a JSON file (orjson decodes straight from bytes)."""
+        return orjson.loads(path.read_bytes())
+except ImportError:
+    def _read_json(path: Path) -> Any:
+        """Parse a JSON file."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+# Rust-backed validator, preferred when installed (pip install jsonschema-rs)
+try:
+    import jsonschema_rs
+except ImportError:
+    jsonschema_rs = None
+
+# Exceptions raised for data that fails its schema
+_VALUE_ERRORS: Tuple[type, ...] = (fastjsonschema.JsonSchemaValueException,)
+if jsonschema_rs is not None:
+    _VALUE_ERRORS += (jsonschema_rs.ValidationError,)
+
+# Ahead-of-time compiled validators written by compile_schemas()
+COMPILED_SCHEMA_DIR = Path(__file__).parent / "_compiled_schemas"
+COMPILED_SCHEMA_PACKAGE = "progship.data._compiled_schemas"
+
+
+def _schema_digest(schema_path: Path) -> str:
+    """SHA-256 of a schema file's bytes, used to spot stale compiled modules."""
+    return hashlib.sha256(schema_path.read_bytes()).hexdigest()
+
+
+def compile_schemas(schema_dir: Path = None, output_dir: Path = COMPILED_SCHEMA_DIR) -> List[Path]:
+    """
+    Generate a Python validator module for every schema in schema_dir.
+    
+    Each module exposes fastjsonschema's generated validate(data) function and
+    the SHA256 of the schema it was built from, so SchemaValidator can import
+    it instead of compiling the schema at runtime.
+    
+    Args:
+        schema_dir: Path to directory containing JSON schemas
+        output_dir: Package directory to write the generated modules to
+        
+    Returns:
+        Paths of the generated modules
+    """
+    if schema_dir is None:
+        schema_dir = Path(__file__).parent.parent.parent / "schemas"
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / "__init__.py").write_text(
+        '"""Generated by progship compile-schemas; do not edit."""\n', encoding='utf-8'
+    )
+    
+    written = []
+    for schema_path in sorted(Path(schema_dir).glob("*.json")):
+        schema = _read_json(schema_path)
+        code = fastjsonschema.compile_to_code(schema)
+        module_path = output_dir / f"{schema_path.stem}.py"
+        module_path.write_text(
+            f'SCHEMA_SHA256 = "{_schema_digest(schema_path)}"\n\n{code}', encoding='utf-8'
+        )
+        written.append(module_path)
+    
+    importlib.invalidate_caches()
+    return written
 
 
 class SchemaValidator:
@@ -30,6 +101,7 @@ class SchemaValidator:
         self.schema_dir = Path(schema_dir)
         self.data_dir = Path(data_dir)
         self.schemas: Dict[str, Any] = {}
+        self._validator_cache: Dict[str, Callable[[Any], Any]] = {}
         
     def load_schema(self, schema_name: str) -> Dict[str, Any]:
         """
@@ -41,9 +113,56 @@ class SchemaValidator:
         Returns:
             Parsed schema dictionary
         """
-        schema_path = self.schema_dir / f"{schema_name}.json"
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        schema = self.schemas.get(schema_name)
+        if schema is None:
+            schema = _read_json(self.schema_dir / f"{schema_name}.json")
+            self.schemas[schema_name] = schema
+        return schema
+    
+    def _get_validator(self, schema_name: str) -> Callable[[Any], Any]:
+        """
+        Get the compiled validator for a schema, building it on first use.
+        
+        With jsonschema-rs installed the schema is compiled to a native Rust
+        validator. Otherwise fastjsonschema generates a Python function
+        specialised to the schema: a module from compile_schemas() is used
+        when it matches the schema file, else the schema is compiled in-process.
+        
+        Args:
+            schema_name: Name of schema file (without .json extension)
+            
+        Returns:
+            Validation function raising one of _VALUE_ERRORS on invalid data
+        """
+        validator = self._validator_cache.get(schema_name)
+        if validator is None:
+            if jsonschema_rs is not None:
+                validator = jsonschema_rs.validator_for(self.load_schema(schema_name)).validate
+            else:
+                validator = self._import_compiled(schema_name)
+                if validator is None:
+                    validator = fastjsonschema.compile(self.load_schema(schema_name))
+            self._validator_cache[schema_name] = validator
+        return validator
+    
+    def _import_compiled(self, schema_name: str):
+        """
+        Import the ahead-of-time compiled validator for a schema.
+        
+        Args:
+            schema_name: Name of schema file (without .json extension)
+            
+        Returns:
+            The module's validate function, or None if it is missing or was
+            generated from a different version of the schema
+        """
+        try:
+            module = importlib.import_module(f"{COMPILED_SCHEMA_PACKAGE}.{schema_name}")
+            if module.SCHEMA_SHA256 != _schema_digest(self.schema_dir / f"{schema_name}.json"):
+                return None
+            return module.validate
+        except (ImportError, AttributeError, OSError):
+            return None
     
     def load_data(self, data_name: str) -> Dict[str, Any]:
         """
@@ -55,9 +174,7 @@ class SchemaValidator:
         Returns:
             Parsed data dictionary
         """
-        data_path = self.data_dir / f"{data_name}.json"
-        with open(data_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return _read_json(self.data_dir / f"{data_name}.json")
     
     def validate_file(self, data_name: str, schema_name: str) -> Tuple[bool, List[str]]:
         """
@@ -72,13 +189,13 @@ class SchemaValidator:
         """
         try:
             data = self.load_data(data_name)
-            schema = self.load_schema(schema_name)
-            
-            validate(instance=data, schema=schema)
+            self._get_validator(schema_name)(data)
             return True, []
             
-        except ValidationError as e:
+        except _VALUE_ERRORS as e:
             return False, [f"Validation error: {e.message}"]
+        except fastjsonschema.JsonSchemaDefinitionException as e:
+            return False, [f"Invalid schema: {e}"]
         except FileNotFoundError as e:
             return False, [f"File not found: {e}"]
         except json.JSONDecodeError as e:
@@ -99,9 +216,13 @@ class SchemaValidator:
             "facilities": "facilities_schema",
         }
         
-        results = {}
-        for data_name, schema_name in validations.items():
-            results[data_name] = self.validate_file(data_name, schema_name)
+        # Files are independent; validate them concurrently
+        with ThreadPoolExecutor(max_workers=len(validations)) as executor:
+            futures = {
+                data_name: executor.submit(self.validate_file, data_name, schema_name)
+                for data_name, schema_name in validations.items()
+            }
+            results = {data_name: future.result() for data_name, future in futures.items()}
         
         return results
     
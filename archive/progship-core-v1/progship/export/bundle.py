@@ -5,22 +5,29 @@ Creates a comprehensive manifest.json that references all generated assets
 (structure, descriptions, images, 3D models) for consumption by any game engine.
 """
 
-from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-import json
+from typing import Dict, List, Optional, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import os
 import hashlib
-from datetime import datetime
+import shutil
+import zipfile
+from datetime import datetime, timezone
 
+import msgspec
 
-@dataclass
-class AssetReference:
+# Threads for the per-component filesystem checks in build_manifest
+ASSET_SCAN_WORKERS = 32
+
+
+class AssetReference(msgspec.Struct):
     """Reference to a single asset with metadata."""
     component_id: str
     component_type: str  # room, facility, structural, light
     
     # File references
     model_path: Optional[str] = None          # GLB model
+    sha256: Optional[str] = None              # SHA-256 of the GLB model
     concept_art_path: Optional[str] = None    # Main concept art PNG
     icon_path: Optional[str] = None           # Thumbnail/icon
     description: Optional[str] = None          # AI-generated text
@@ -35,22 +42,18 @@ class AssetReference:
     bounding_box: Optional[Dict[str, float]] = None
     material_hints: Optional[List[str]] = None
     
-    # File validation
-    model_exists: bool = False
+    # File validation (underscore-prefixed in JSON: internal, but kept so a
+    # loaded manifest can still be passed to validate_bundle)
+    model_exists: bool = msgspec.field(default=False, name="_model_exists")
     model_size_mb: float = 0.0
-    concept_art_exists: bool = False
+    concept_art_exists: bool = msgspec.field(default=False, name="_concept_art_exists")
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary, excluding validation fields."""
-        d = asdict(self)
-        # Remove validation fields (internal only)
-        d.pop('model_exists', None)
-        d.pop('concept_art_exists', None)
-        return d
+        """Convert to a JSON-ready dictionary."""
+        return msgspec.to_builtins(self)
 
 
-@dataclass
-class AssetBundleManifest:
+class AssetBundleManifest(msgspec.Struct):
     """Complete manifest for generated ship assets."""
     # Ship metadata
     ship_id: str
@@ -80,28 +83,69 @@ class AssetBundleManifest:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
-        d = asdict(self)
-        # Convert nested AssetReference objects
-        d['assets'] = {k: v.to_dict() if isinstance(v, AssetReference) else v 
-                       for k, v in self.assets.items()}
-        return d
+        return msgspec.to_builtins(self)
     
-    def to_json(self, output_path: Path, indent: int = 2) -> None:
-        """Save manifest to JSON file."""
-        with open(output_path, 'w') as f:
-            json.dump(self.to_dict(), f, indent=indent)
+    def to_json(self, output_path: Path, indent: int = 2) -> bool:
+        """
+        Save manifest to JSON file, skipping the write if it is unchanged.
+        
+        The manifest already on disk is compared with this one, ignoring
+        generation_timestamp (which differs on every build), so re-exporting
+        the same assets leaves the file and its timestamp untouched.
+        
+        Returns:
+            True if the file was (re)written
+        """
+        output_path = Path(output_path)
+        
+        try:
+            existing = output_path.read_bytes()
+            existing_timestamp = msgspec.json.decode(existing)["generation_timestamp"]
+        except (OSError, msgspec.DecodeError, KeyError, TypeError):
+            existing = existing_timestamp = None
+        
+        if isinstance(existing_timestamp, str):
+            # Encode as if built at the existing file's time: identical bytes
+            # mean nothing but the timestamp changed
+            unchanged = msgspec.structs.replace(self, generation_timestamp=existing_timestamp)
+            if self._encode(unchanged, indent) == existing:
+                return False
+        
+        output_path.write_bytes(self._encode(self, indent))
+        return True
+    
+    @staticmethod
+    def _encode(manifest: 'AssetBundleManifest', indent: int) -> bytes:
+        """Encode to JSON bytes (msgspec writes the structs directly, no dicts)."""
+        data = msgspec.json.encode(manifest)
+        if indent:
+            data = msgspec.json.format(data, indent=indent)
+        return data
     
     @classmethod
     def from_json(cls, input_path: Path) -> 'AssetBundleManifest':
-        """Load manifest from JSON file."""
-        with open(input_path, 'r') as f:
-            data = json.load(f)
-        
-        # Convert asset dicts back to AssetReference objects
-        assets = {k: AssetReference(**v) for k, v in data['assets'].items()}
-        data['assets'] = assets
-        
-        return cls(**data)
+        """Load manifest from JSON file, checking it against the manifest types."""
+        return msgspec.json.decode(Path(input_path).read_bytes(), type=cls)
+
+
+def _file_sha256(path: Path) -> str:
+    """SHA-256 of a file, streamed so large GLBs are never held in memory."""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        digest = hashlib.sha256()
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
+def _scan_dir(directory: Path) -> Dict[str, os.DirEntry]:
+    """List a directory once, keyed by entry name (empty if it doesn't exist)."""
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name: entry for entry in entries}
+    except (FileNotFoundError, NotADirectoryError):
+        return {}
 
 
 class AssetBundleBuilder:
@@ -110,6 +154,70 @@ class AssetBundleBuilder:
     def __init__(self, output_dir: Path):
         self.output_dir = Path(output_dir)
         
+    def _build_asset(
+        self,
+        comp: Dict[str, Any],
+        models_dir: Path,
+        images_dir: Path,
+        model_entries: Dict[str, os.DirEntry],
+        verbose: bool = True
+    ) -> Tuple[AssetReference, List[str]]:
+        """
+        Locate one component's model and concept art.
+        
+        Returns:
+            Tuple of (asset reference, report lines to print; empty unless verbose)
+        """
+        comp_id = comp['component_id']
+        comp_type = comp['component_type']
+        output_dir = self.output_dir
+        model_name = f"{comp_id}.glb"
+        image_name = f"{comp_id}_main.png"
+        
+        # Find model
+        model_path = models_dir / model_name
+        model_entry = model_entries.get(model_name)
+        model_exists = model_entry is not None and model_entry.is_file()
+        model_size_mb = 0.0
+        model_sha256 = None
+        if model_exists:
+            model_size_mb = model_entry.stat().st_size / (1024 * 1024)
+            model_sha256 = _file_sha256(model_path)
+        
+        # Find concept art
+        image_dir = images_dir / comp_id
+        concept_exists = image_name in _scan_dir(image_dir)
+        
+        report = []
+        if verbose:
+            report.append(f"\n[{comp_id}] ({comp_type})")
+            if model_exists:
+                report.append(f"  ✓ Model: {model_name} ({model_size_mb:.2f} MB)")
+            else:
+                report.append(f"  ✗ Model: {model_name} NOT FOUND")
+            if concept_exists:
+                report.append(f"  ✓ Image: {image_name}")
+            else:
+                report.append("  ✗ Image: NOT FOUND")
+        
+        # Create asset reference
+        asset = AssetReference(
+            component_id=comp_id,
+            component_type=comp_type,
+            model_path=str(model_path.relative_to(output_dir)) if model_exists else None,
+            sha256=model_sha256,
+            concept_art_path=(
+                str((image_dir / image_name).relative_to(output_dir)) if concept_exists else None
+            ),
+            description=comp.get('generated_description'),
+            dimensions=comp.get('dimensions'),
+            material_hints=comp.get('material_hints'),
+            model_exists=model_exists,
+            model_size_mb=model_size_mb,
+            concept_art_exists=concept_exists
+        )
+        return asset, report
+    
     def build_manifest(
         self,
         ship_id: str,
@@ -119,7 +227,8 @@ class AssetBundleBuilder:
         structure_path: Path,
         descriptions_path: Path,
         images_dir: Path,
-        models_dir: Path
+        models_dir: Path,
+        verbose: bool = True
     ) -> AssetBundleManifest:
         """
         Build complete asset bundle manifest.
@@ -133,6 +242,7 @@ class AssetBundleBuilder:
             descriptions_path: Path to descriptions.json
             images_dir: Directory containing concept art
             models_dir: Directory containing GLB models
+            verbose: Print a found/missing report for every component
             
         Returns:
             Complete AssetBundleManifest
@@ -142,62 +252,33 @@ class AssetBundleBuilder:
         print("=" * 80)
         
         # Load descriptions
-        with open(descriptions_path, 'r') as f:
-            descriptions_data = json.load(f)
+        descriptions_data = msgspec.json.decode(Path(descriptions_path).read_bytes())
         
         components = descriptions_data.get('components', [])
         print(f"\nFound {len(components)} components in descriptions")
         
-        # Build asset references
+        # One listing of the models folder instead of stat calls per component
+        model_entries = _scan_dir(models_dir)
+        
+        # The per-component checks are independent filesystem calls; overlap
+        # them in threads and print each component's report in order afterwards
+        with ThreadPoolExecutor(max_workers=ASSET_SCAN_WORKERS) as executor:
+            results = list(executor.map(
+                lambda comp: self._build_asset(
+                    comp, models_dir, images_dir, model_entries, verbose
+                ),
+                components
+            ))
+        
         assets = {}
-        total_size = 0.0
-        models_count = 0
-        images_count = 0
+        for asset, report in results:
+            if report:
+                print("\n".join(report))
+            assets[asset.component_id] = asset
         
-        for comp in components:
-            comp_id = comp['component_id']
-            comp_type = comp['component_type']
-            
-            print(f"\n[{comp_id}] ({comp_type})")
-            
-            # Find model
-            model_path = models_dir / f"{comp_id}.glb"
-            model_exists = model_path.exists()
-            model_size_mb = 0.0
-            
-            if model_exists:
-                model_size_mb = model_path.stat().st_size / (1024 * 1024)
-                total_size += model_size_mb
-                models_count += 1
-                print(f"  ✓ Model: {model_path.name} ({model_size_mb:.2f} MB)")
-            else:
-                print(f"  ✗ Model: {model_path.name} NOT FOUND")
-            
-            # Find concept art
-            concept_art_path = images_dir / comp_id / f"{comp_id}_main.png"
-            concept_exists = concept_art_path.exists()
-            
-            if concept_exists:
-                images_count += 1
-                print(f"  ✓ Image: {concept_art_path.name}")
-            else:
-                print(f"  ✗ Image: NOT FOUND")
-            
-            # Create asset reference
-            asset = AssetReference(
-                component_id=comp_id,
-                component_type=comp_type,
-                model_path=str(model_path.relative_to(self.output_dir)) if model_exists else None,
-                concept_art_path=str(concept_art_path.relative_to(self.output_dir)) if concept_exists else None,
-                description=comp.get('generated_description'),
-                dimensions=comp.get('dimensions'),
-                material_hints=comp.get('material_hints'),
-                model_exists=model_exists,
-                model_size_mb=model_size_mb,
-                concept_art_exists=concept_exists
-            )
-            
-            assets[comp_id] = asset
+        total_size = sum(a.model_size_mb for a in assets.values())
+        models_count = sum(1 for a in assets.values() if a.model_exists)
+        images_count = sum(1 for a in assets.values() if a.concept_art_exists)
         
         # Create manifest
         manifest = AssetBundleManifest(
@@ -205,7 +286,7 @@ class AssetBundleBuilder:
             ship_type_id=ship_type_id,
             style_id=style_id,
             seed=seed,
-            generation_timestamp=datetime.utcnow().isoformat(),
+            generation_timestamp=datetime.now(timezone.utc).isoformat(),
             structure_path=str(structure_path.relative_to(self.output_dir)) if structure_path.exists() else "",
             descriptions_path=str(descriptions_path.relative_to(self.output_dir)),
             assets=assets,
@@ -243,8 +324,10 @@ class AssetBundleBuilder:
         
         # Save manifest
         manifest_path = bundle_dir / "manifest.json"
-        manifest.to_json(manifest_path)
-        print(f"\n✓ Manifest: {manifest_path}")
+        if manifest.to_json(manifest_path):
+            print(f"\n✓ Manifest: {manifest_path}")
+        else:
+            print(f"\n✓ Manifest: {manifest_path} (unchanged)")
         
         # TODO: Copy all referenced files to bundle directory
         # (For now, manifest just references files in place)
@@ -252,10 +335,54 @@ class AssetBundleBuilder:
         print(f"\n✓ Bundle exported to: {bundle_dir}")
         
         if create_archive:
-            # TODO: Create .zip archive
-            print(f"\nℹ Archive creation not yet implemented")
+            archive_path = bundle_dir.parent / f"{bundle_dir.name}.zip"
+            file_count = self.create_archive(manifest, manifest_path, archive_path)
+            print(f"✓ Archive: {archive_path} ({file_count} files)")
         
         return bundle_dir
+    
+    def create_archive(
+        self,
+        manifest: AssetBundleManifest,
+        manifest_path: Path,
+        archive_path: Path
+    ) -> int:
+        """
+        Write the manifest and every file it references to a .zip archive.
+        
+        PNG and GLB files are already compressed, so they are stored as-is
+        and streamed into the archive in 1 MiB blocks; only the manifest
+        itself is deflated.
+        
+        Args:
+            manifest: Asset bundle manifest
+            manifest_path: Saved manifest.json to include at the archive root
+            archive_path: Output .zip path
+            
+        Returns:
+            Number of files written to the archive
+        """
+        rel_paths = [manifest.structure_path, manifest.descriptions_path]
+        for asset in manifest.assets.values():
+            rel_paths.extend((asset.model_path, asset.concept_art_path, asset.icon_path))
+        # Paths are relative to the builder's output_dir; keep order, drop duplicates
+        rel_paths = list(dict.fromkeys(p for p in rel_paths if p))
+        
+        with zipfile.ZipFile(archive_path, 'w') as zf:
+            zf.write(manifest_path, arcname="manifest.json", compress_type=zipfile.ZIP_DEFLATED)
+            count = 1
+            for rel in rel_paths:
+                src = self.output_dir / rel
+                if not src.is_file():
+                    print(f"  ✗ Missing from archive: {rel}")
+                    continue
+                info = zipfile.ZipInfo.from_file(src, arcname=Path(rel).as_posix())
+                info.compress_type = zipfile.ZIP_STORED
+                with open(src, 'rb') as src_f, zf.open(info, 'w') as dst:
+                    shutil.copyfileobj(src_f, dst, length=1 << 20)
+                count += 1
+        
+        return count
 
 
 def validate_bundle(manifest: AssetBundleManifest) -> Dict[str, Any]:
@@ -5,12 +5,16 @@ Ported from C# ShipArchitect.cs with improvements for engine-agnostic output.
 """
 
 import random
-from typing import List, Optional, Tuple
+import numpy as np
+from typing import List, Optional, TYPE_CHECKING
 from progship.data.models import (
-    ShipType, Room, PlacedRoom, Transform3D, ShipStructure
+    ShipType, Room, Dims, PlacedRoom, Transform3D, ShipStructure, StyleDescriptor
 )
 from progship.data.loader import DatabaseLoader
 
+if TYPE_CHECKING:
+    from progship.generation.interior import InteriorGenerator
+
 
 class ShipArchitect:
     """Generates spatial layout of rooms in a ship."""
@@ -22,7 +26,9 @@ class ShipArchitect:
         self,
         ship_type: ShipType,
         target_room_count: int = 10,
-        seed: Optional[int] = None
+        seed: Optional[int] = None,
+        interior_gen: Optional["InteriorGenerator"] = None,
+        style: Optional[StyleDescriptor] = None
     ) -> List[PlacedRoom]:
         """
         Generate room layout for a ship.
@@ -31,6 +37,8 @@ class ShipArchitect:
             ship_type: Ship archetype
             target_room_count: Desired number of rooms
             seed: Random seed for reproducibility
+            interior_gen: If given (with style), furnish each room as it is placed
+            style: Visual style for facility variants
             
         Returns:
             List of placed rooms with transforms
@@ -38,45 +46,57 @@ class ShipArchitect:
         if seed is not None:
             random.seed(seed)
         
-        rooms = []
         room_db = self.loader.load_rooms()
         
-        # For now, use simple linear stacking
-        # TODO: Implement greedy DFS with constraint checking (Phase 2)
-        position_y = 0.0
+        # Candidate rooms: the typical rooms for this ship type (any room if none match)
+        available_rooms: List[Room] = []
+        if ship_type.typical_rooms and room_db.rooms:
+            typical_ids = set(ship_type.typical_rooms)
+            available_rooms = [r for r in room_db.rooms if r.id in typical_ids] or room_db.rooms
         
-        for i in range(target_room_count):
-            # Pick room from typical rooms for this ship type
-            if ship_type.typical_rooms and room_db.rooms:
-                available_rooms = [r for r in room_db.rooms if r.id in ship_type.typical_rooms]
-                if not available_rooms:
-                    available_rooms = room_db.rooms
-                room = random.choice(available_rooms)
-            else:
-                # Fallback: create placeholder room
-                room = Room(
+        # Sample every room first (in one call), then lay them all out in one pass
+        if available_rooms:
+            chosen = random.choices(available_rooms, k=target_room_count)
+        else:
+            # Fallback: create placeholder rooms
+            chosen = [
+                Room(
                     id=f"room_{i}",
                     name=f"Room {i}",
-                    dimensions={"width": 10.0, "height": 3.0, "depth": 10.0}
+                    dimensions=Dims(width=10.0, height=3.0, depth=10.0)
                 )
-            
-            # Stack rooms vertically for now
-            transform = Transform3D(
+                for i in range(target_room_count)
+            ]
+        
+        # For now, use simple linear stacking: each room sits on the one below,
+        # so its Y position is the running sum of the heights before it
+        # TODO: Implement greedy DFS with constraint checking (Phase 2)
+        heights = np.fromiter(
+            (room.dimensions.height for room in chosen), dtype=np.float64, count=len(chosen)
+        )
+        positions_y = np.concatenate(([0.0], np.cumsum(heights)[:-1]))
+        
+        # Transforms and rooms are built from known-good values, so skip validation
+        rooms = []
+        for room, position_y in zip(chosen, positions_y.tolist()):
+            transform = Transform3D.model_construct(
                 position=[0.0, position_y, 0.0],
                 rotation=[0.0, 0.0, 0.0, 1.0],  # No rotation (quaternion identity)
                 scale=[1.0, 1.0, 1.0]
             )
             
-            placed_room = PlacedRoom(
+            placed_room = PlacedRoom.model_construct(
                 room_id=room.id,
                 transform=transform,
                 facilities=[]
             )
-            rooms.append(placed_room)
             
-            # Advance position for next room
-            room_height = room.dimensions.get("height", 3.0)
-            position_y += room_height
+            # Furnish the room while its template is at hand (all rooms were already
+            # sampled, so place_facilities reseeding the RNG can't change the picks)
+            if interior_gen is not None:
+                placed_room.facilities = interior_gen.place_facilities(room, style, seed)
+            
+            rooms.append(placed_room)
         
         return rooms
     
@@ -85,7 +105,8 @@ class ShipArchitect:
         ship_type_id: str,
         style_id: str,
         room_count: int = 10,
-        seed: Optional[int] = None
+        seed: Optional[int] = None,
+        interior_gen: Optional["InteriorGenerator"] = None
     ) -> ShipStructure:
         """
         Generate complete ship structure.
@@ -95,6 +116,7 @@ class ShipArchitect:
             style_id: Style descriptor ID
             room_count: Number of rooms
             seed: Random seed
+            interior_gen: If given, rooms are populated with facilities as they are placed
             
         Returns:
             ShipStructure with rooms and metadata
@@ -107,7 +129,7 @@ class ShipArchitect:
         if not style:
             raise ValueError(f"Unknown style: {style_id}")
         
-        rooms = self.generate_layout(ship_type, room_count, seed)
+        rooms = self.generate_layout(ship_type, room_count, seed, interior_gen, style)
         
         structure = ShipStructure(
             ship_type_id=ship_type_id,
@@ -5,6 +5,7 @@ Ported from C# InteriorGenerator.cs with constraint-based placement.
 """
 
 import random
+import numpy as np
 from typing import List, Optional
 from progship.data.models import (
     Room, Facility, PlacedFacility, Transform3D, StyleDescriptor
@@ -49,11 +50,18 @@ class InteriorGenerator:
         # Simple rule-based placement for now
         # TODO: Implement constraint solver (simulated annealing) - Phase 2
         
-        room_width = room.dimensions.get("width", 10.0)
-        room_depth = room.dimensions.get("depth", 10.0)
+        room_width = room.dimensions.width
+        room_depth = room.dimensions.depth
         
-        for i, facility_id in enumerate(facility_ids):
-            facility = self.loader.get_facility(facility_id)
+        # Simple grid placement (temporary): three facilities per row,
+        # all positions computed in one vectorized pass
+        idx = np.arange(len(facility_ids))
+        xs = ((idx % 3) * (room_width / 3) - room_width/2 + 1.0).tolist()
+        zs = ((idx // 3) * (room_depth / 3) - room_depth/2 + 1.0).tolist()
+        
+        get_facility = self.loader.get_facility
+        for facility_id, x, z in zip(facility_ids, xs, zs):
+            facility = get_facility(facility_id)
             if not facility:
                 continue
             
@@ -61,17 +69,14 @@ class InteriorGenerator:
             variant = facility.get_variant(style.id)
             variant_id = variant.id if variant else None
             
-            # Simple grid placement (temporary)
-            x = (i % 3) * (room_width / 3) - room_width/2 + 1.0
-            z = (i // 3) * (room_depth / 3) - room_depth/2 + 1.0
-            
-            transform = Transform3D(
+            # Transforms are built from known-good values, so skip validation
+            transform = Transform3D.model_construct(
                 position=[x, 0.0, z],
                 rotation=[0.0, 0.0, 0.0, 1.0],
                 scale=[1.0, 1.0, 1.0]
             )
             
-            placed = PlacedFacility(
+            placed = PlacedFacility.model_construct(
                 facility_id=facility_id,
                 variant_id=variant_id,
                 transform=transform
@@ -1,26 +1,33 @@
 """Pipeline modules for AI-powered content generation."""
 
-from .llm import OllamaClient, LLMConfig, create_client
+from .llm import OllamaClient, VLLMClient, LLMConfig, create_client
 from .cache import DescriptionCache, CachedDescription
+from .embedding_cache import PromptEmbeddingCache
 from .prompts import PromptBuilder, get_camera_angles
 from .description_generator import DescriptionGenerator
 from .image_generator import QwenImageGenerator, ImageConfig
 from .image_pipeline import ImagePipeline, ImageManifest
+from .inference_server import InferenceServer
 from .image_processing import ImageProcessor, process_image, batch_process_images
 from .model_registry import (
     ModelType,
     ModelInfo,
     create_generator,
+    get_generator,
+    generator_lock,
+    clear_generator_cache,
     get_model_info,
     list_available_models
 )
 
 __all__ = [
     'OllamaClient',
+    'VLLMClient',
     'LLMConfig',
     'create_client',
     'DescriptionCache',
     'CachedDescription',
+    'PromptEmbeddingCache',
     'PromptBuilder',
     'get_camera_angles',
     'DescriptionGenerator',
@@ -28,12 +35,16 @@ __all__ = [
     'ImageConfig',
     'ImagePipeline',
     'ImageManifest',
+    'InferenceServer',
     'ImageProcessor',
     'process_image',
     'batch_process_images',
     'ModelType',
     'ModelInfo',
     'create_generator',
+    'get_generator',
+    'generator_lock',
+    'clear_generator_cache',
     'get_model_info',
     'list_available_models',
 ]
@@ -0,0 +1,75 @@
+"""
+Pixel-scan kernels for image post-processing.
+
+With numba installed (pip install numba) these are compiled, row-parallel
+single passes over the pixel buffer; otherwise they fall back to the
+equivalent NumPy reductions.
+"""
+
+from typing import Tuple
+import numpy as np
+
+try:
+    from numba import njit, prange, set_num_threads
+
+    @njit(parallel=True, cache=True)
+    def row_col_min(gray: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Darkest value of every row and every column of a uint8 (H, W) image, in one pass."""
+        height, width = gray.shape
+        n_blocks = min(height, 64)
+        row_min = np.empty(height, np.uint8)
+        # Each block of rows keeps its own column minima, merged afterwards,
+        # so parallel blocks never write to the same slot
+        block_col_min = np.full((n_blocks, width), 255, np.uint8)
+        for b in prange(n_blocks):
+            for y in range(b * height // n_blocks, (b + 1) * height // n_blocks):
+                darkest = 255
+                for x in range(width):
+                    v = gray[y, x]
+                    if v < darkest:
+                        darkest = v
+                    if v < block_col_min[b, x]:
+                        block_col_min[b, x] = v
+                row_min[y] = darkest
+
+        col_min = np.full(width, 255, np.uint8)
+        for b in range(n_blocks):
+            for x in range(width):
+                if block_col_min[b, x] < col_min[x]:
+                    col_min[x] = block_col_min[b, x]
+        return row_min, col_min
+
+    @njit(parallel=True, cache=True)
+    def rgb_moments(pixels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-channel mean and population stddev of a uint8 (H, W, C) image, in one pass."""
+        height, width, channels = pixels.shape
+        sums = np.zeros((height, channels))
+        squares = np.zeros((height, channels))
+        for y in prange(height):
+            for x in range(width):
+                for c in range(channels):
+                    v = float(pixels[y, x, c])
+                    sums[y, c] += v
+                    squares[y, c] += v * v
+
+        n = height * width
+        mean = sums.sum(axis=0) / n
+        variance = squares.sum(axis=0) / n - mean * mean
+        return mean, np.sqrt(np.maximum(variance, 0.0))
+
+    def set_kernel_threads(n: int):
+        """Cap the threads each kernel call uses (e.g. 1 inside a process pool)."""
+        set_num_threads(n)
+
+except ImportError:
+    def row_col_min(gray: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Darkest value of every row and every column of a uint8 (H, W) image."""
+        return gray.min(axis=1), gray.min(axis=0)
+
+    def rgb_moments(pixels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-channel mean and population stddev of a uint8 (H, W, C) image."""
+        channels = pixels.reshape(-1, pixels.shape[2])
+        return channels.mean(axis=0, dtype=np.float64), channels.std(axis=0, dtype=np.float64)
+
+    def set_kernel_threads(n: int):
+        """No-op without numba: the NumPy reductions are single-threaded."""
@@ -2,11 +2,15 @@
 
 import hashlib
 import json
-from datetime import datetime
+import sqlite3
+import time
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 from dataclasses import dataclass, asdict
 
+import numpy as np
+
 
 @dataclass
 class CachedDescription:
@@ -22,18 +26,200 @@ class CachedDescription:
 class DescriptionCache:
     """Cache for LLM-generated descriptions."""
     
-    def __init__(self, cache_dir: str = ".cache/descriptions", enabled: bool = True):
+    _ENTRY_COLUMNS = (
+        "cache_key, prompt, response, timestamp, model_name, metadata, last_access, size"
+    )
+    
+    def __init__(
+        self,
+        cache_dir: str = ".cache/descriptions",
+        enabled: bool = True,
+        embedder: Optional[Callable[[str], Sequence[float]]] = None,
+        similarity_threshold: float = 0.9,
+        max_bytes: Optional[int] = None,
+    ):
         """Initialize description cache.
         
+        Entries live in a single SQLite database inside cache_dir, so a lookup
+        is one indexed query rather than a stat/open/parse of its own file.
+        
+        With an embedder, an exact-key miss falls back to the cached entry
+        for the same component (same ship type, style, component id and type;
+        any seed) whose prompt embedding is closest to the new prompt, if its
+        cosine similarity reaches similarity_threshold. Prompts for different
+        components share one template, so they are never compared.
+        
+        With max_bytes, set() evicts least recently used entries until the
+        prompts, responses and metadata stored fit within it.
+        
         Args:
-            cache_dir: Directory to store cache files
+            cache_dir: Directory to store the cache database
             enabled: Whether caching is enabled
+            embedder: Text embedding function for semantic lookups (e.g. OllamaClient.embed)
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            max_bytes: Size cap for stored entries (None for unbounded)
         """
         self.cache_dir = Path(cache_dir)
         self.enabled = enabled
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.max_bytes = max_bytes
+        self.db_path = self.cache_dir / "descriptions.sqlite3"
+        self._db: Optional[sqlite3.Connection] = None
+        
+        # Semantic index, loaded from the embeddings table on first use:
+        # (component, dimensions) -> (cache keys, unit-norm float32 matrix),
+        # where component is (ship_type_id, style_id, component_id, component_type)
+        self._vector_index: Optional[Dict[tuple, Tuple[List[str], np.ndarray]]] = None
+        # Embeddings computed by get() on a miss, reused when set() stores them
+        self._pending_vectors: Dict[str, np.ndarray] = {}
         
         if self.enabled:
             self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "cache_key TEXT PRIMARY KEY, prompt TEXT, response TEXT, "
+                "timestamp TEXT, model_name TEXT, metadata TEXT, "
+                "last_access INTEGER, size INTEGER)"
+            )
+            self._add_lru_columns()
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "cache_key TEXT PRIMARY KEY, component_type TEXT, vector BLOB)"
+            )
+            self._import_legacy_files()
+            self._rekey_sha256_entries()
+            if self.max_bytes is not None:
+                self._evict()
+    
+    def _add_lru_columns(self):
+        """Add the LRU bookkeeping columns to a database created before them."""
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(entries)")}
+        if "last_access" in columns:
+            return
+        with self._db:
+            self._db.execute("ALTER TABLE entries ADD COLUMN last_access INTEGER")
+            self._db.execute("ALTER TABLE entries ADD COLUMN size INTEGER")
+            self._db.execute(
+                "UPDATE entries SET last_access = 0, size = "
+                "length(CAST(prompt AS BLOB)) + length(CAST(response AS BLOB)) "
+                "+ length(CAST(metadata AS BLOB))"
+            )
+    
+    def _import_legacy_files(self):
+        """Move entries from the old one-JSON-file-per-entry layout into the database.
+        
+        Only files that were read successfully are removed; corrupted ones are
+        renamed to *.json.corrupt so they are kept but not retried every start.
+        """
+        legacy_files = list(self.cache_dir.glob("*.json"))
+        if not legacy_files:
+            return
+        
+        rows = []
+        imported = []
+        for cache_file in legacy_files:
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                metadata = json.dumps(data.get("metadata", {}))
+                rows.append((
+                    cache_file.stem, data["prompt"], data["response"], data["timestamp"],
+                    data["model_name"], metadata, 0,
+                    self._entry_size(data["prompt"], data["response"], metadata),
+                ))
+                imported.append(cache_file)
+            except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError) as e:
+                print(f"⚠ Warning: Corrupted cache file {cache_file}, keeping it as .corrupt: {e}")
+                try:
+                    cache_file.rename(cache_file.with_name(cache_file.name + ".corrupt"))
+                except OSError:
+                    pass
+            except OSError as e:
+                print(f"⚠ Warning: Could not read cache file {cache_file}, leaving it: {e}")
+        
+        with self._db:
+            self._db.executemany(
+                f"INSERT OR IGNORE INTO entries ({self._ENTRY_COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        for cache_file in imported:
+            cache_file.unlink(missing_ok=True)
+    
+    @staticmethod
+    def _entry_size(prompt: str, response: str, metadata: str) -> int:
+        """Bytes an entry counts against max_bytes."""
+        return len(prompt.encode()) + len(response.encode()) + len(metadata.encode())
+    
+    def _evict(self, keep: Optional[str] = None):
+        """Delete least recently used entries until the total size fits max_bytes.
+        
+        Args:
+            keep: Cache key never to evict (the entry just written)
+        """
+        total = self._db.execute("SELECT coalesce(sum(size), 0) FROM entries").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+        
+        victims = []
+        for cache_key, size in self._db.execute(
+            "SELECT cache_key, size FROM entries WHERE cache_key != ? ORDER BY last_access",
+            (keep,),
+        ):
+            victims.append((cache_key,))
+            excess -= size or 0
+            if excess <= 0:
+                break
+        
+        with self._db:
+            self._db.executemany("DELETE FROM entries WHERE cache_key = ?", victims)
+            self._db.executemany("DELETE FROM embeddings WHERE cache_key = ?", victims)
+        self._vector_index = None
+    
+    def _rekey_sha256_entries(self):
+        """Move entries keyed by the old SHA-256 scheme onto their BLAKE2b keys.
+        
+        The key is rebuilt from the component parameters stored in each
+        entry's metadata; entries whose metadata can't be read are dropped,
+        since no lookup can reach them.
+        """
+        rekeyed, dropped = [], []
+        for old_key, metadata in self._db.execute(
+            "SELECT cache_key, metadata FROM entries WHERE length(cache_key) = 64"
+        ):
+            try:
+                params = json.loads(metadata)
+                new_key = self._compute_cache_key(
+                    params["ship_type_id"], params["style_id"], params["seed"],
+                    params["component_id"], params["component_type"],
+                )
+            except (TypeError, json.JSONDecodeError, KeyError) as e:
+                print(f"⚠ Warning: Unreadable metadata for cache entry {old_key}, dropping: {e}")
+                dropped.append((old_key,))
+                continue
+            rekeyed.append((new_key, old_key))
+        
+        if not rekeyed and not dropped:
+            return
+        with self._db:
+            # An entry already stored under the new key is newer; keep it
+            self._db.executemany(
+                "UPDATE OR IGNORE entries SET cache_key = ? WHERE cache_key = ?", rekeyed
+            )
+            self._db.executemany(
+                "UPDATE OR IGNORE embeddings SET cache_key = ? WHERE cache_key = ?", rekeyed
+            )
+            # Whatever is left under an old key is unreadable or superseded
+            self._db.execute("DELETE FROM entries WHERE length(cache_key) = 64")
+            self._db.execute("DELETE FROM embeddings WHERE length(cache_key) = 64")
+        self._vector_index = None
     
     def _compute_cache_key(
         self,
@@ -43,7 +229,10 @@ class DescriptionCache:
         component_id: str,
         component_type: str,
     ) -> str:
-        """Compute SHA256 cache key from component parameters.
+        """Compute BLAKE2b cache key from component parameters.
+        
+        The key only has to be collision-free, not cryptographically strong,
+        so a 16-byte BLAKE2b digest is used rather than SHA-256.
         
         Args:
             ship_type_id: Ship type identifier
@@ -53,7 +242,7 @@ class DescriptionCache:
             component_type: "facility" or "room"
             
         Returns:
-            Hex-encoded SHA256 hash
+            Hex-encoded 128-bit BLAKE2b hash
         """
         key_parts = [
             ship_type_id,
@@ -63,7 +252,69 @@ class DescriptionCache:
             component_type,
         ]
         key_string = "|".join(key_parts)
-        return hashlib.sha256(key_string.encode()).hexdigest()
+        return hashlib.blake2b(key_string.encode(), digest_size=16).hexdigest()
+    
+    def _embed(self, prompt: str) -> Optional[np.ndarray]:
+        """Embed a prompt as a unit-norm float32 vector (None if the embedder fails)."""
+        try:
+            vector = np.asarray(self.embedder(prompt), dtype=np.float32)
+        except Exception as e:
+            print(f"⚠ Warning: Failed to embed prompt for semantic cache: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+    
+    def _load_vector_index(self) -> Dict[tuple, Tuple[List[str], np.ndarray]]:
+        """Group the stored prompt embeddings into one matrix per component.
+        
+        Grouping also by vector length keeps embeddings from a different
+        embedding model from ever being compared with the current one.
+        """
+        if self._vector_index is None:
+            grouped: Dict[tuple, Tuple[List[str], List[np.ndarray]]] = {}
+            for cache_key, blob, metadata in self._db.execute(
+                "SELECT embeddings.cache_key, embeddings.vector, entries.metadata "
+                "FROM embeddings JOIN entries USING (cache_key)"
+            ):
+                try:
+                    params = json.loads(metadata)
+                    component = (
+                        params["ship_type_id"], params["style_id"],
+                        params["component_id"], params["component_type"],
+                    )
+                except (TypeError, json.JSONDecodeError, KeyError):
+                    continue
+                vector = np.frombuffer(blob, dtype=np.float32)
+                keys, vectors = grouped.setdefault((component, len(vector)), ([], []))
+                keys.append(cache_key)
+                vectors.append(vector)
+            self._vector_index = {
+                group: (keys, np.vstack(vectors)) for group, (keys, vectors) in grouped.items()
+            }
+        return self._vector_index
+    
+    def _semantic_match(self, prompt: str, component: tuple) -> Optional[str]:
+        """Find the cache key whose prompt is closest to `prompt`, above the threshold.
+        
+        Args:
+            prompt: Prompt that would be sent to the LLM
+            component: (ship_type_id, style_id, component_id, component_type)
+        """
+        vector = self._embed(prompt)
+        if vector is None:
+            return None
+        
+        group = self._load_vector_index().get((component, len(vector)))
+        if group is not None:
+            keys, matrix = group
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.similarity_threshold:
+                return keys[best]
+        
+        # A miss is followed by set() for this prompt, which reuses the vector
+        self._pending_vectors[prompt] = vector
+        return None
     
     def get(
         self,
@@ -72,6 +323,7 @@ class DescriptionCache:
         seed: int,
         component_id: str,
         component_type: str,
+        prompt: Optional[str] = None,
     ) -> Optional[CachedDescription]:
         """Retrieve cached description if available.
         
@@ -81,6 +333,7 @@ class DescriptionCache:
             seed: Random seed
             component_id: Component identifier
             component_type: "facility" or "room"
+            prompt: Prompt that would be sent to the LLM, for semantic lookups
             
         Returns:
             CachedDescription if found, None otherwise
@@ -91,24 +344,36 @@ class DescriptionCache:
         cache_key = self._compute_cache_key(
             ship_type_id, style_id, seed, component_id, component_type
         )
-        cache_file = self.cache_dir / f"{cache_key}.json"
+        query = "SELECT prompt, response, timestamp, model_name FROM entries WHERE cache_key = ?"
+        row = self._db.execute(query, (cache_key,)).fetchone()
+        
+        if row is None and self.embedder is not None and prompt is not None:
+            match_key = self._semantic_match(
+                prompt, (ship_type_id, style_id, component_id, component_type)
+            )
+            if match_key is not None:
+                cache_key = match_key
+                row = self._db.execute(query, (cache_key,)).fetchone()
         
-        if not cache_file.exists():
+        if row is None:
             return None
         
         try:
-            with open(cache_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return CachedDescription(
-                    prompt=data["prompt"],
-                    response=data["response"],
-                    timestamp=data["timestamp"],
-                    model_name=data["model_name"],
-                    cache_key=cache_key,
-                )
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"⚠ Warning: Corrupted cache file {cache_file}, ignoring: {e}")
-            return None
+            self._db.execute(
+                "UPDATE entries SET last_access = ? WHERE cache_key = ?",
+                (time.time_ns(), cache_key),
+            )
+        except sqlite3.Error as e:
+            print(f"⚠ Warning: Failed to update cache entry {cache_key}: {e}")
+        
+        prompt, response, timestamp, model_name = row
+        return CachedDescription(
+            prompt=prompt,
+            response=response,
+            timestamp=timestamp,
+            model_name=model_name,
+            cache_key=cache_key,
+        )
     
     def set(
         self,
@@ -139,58 +404,111 @@ class DescriptionCache:
         cache_key = self._compute_cache_key(
             ship_type_id, style_id, seed, component_id, component_type
         )
-        cache_file = self.cache_dir / f"{cache_key}.json"
-        
-        data = {
-            "prompt": prompt,
-            "response": response,
-            "timestamp": datetime.utcnow().isoformat(),
-            "model_name": model_name,
-            "cache_key": cache_key,
-            "metadata": {
-                "ship_type_id": ship_type_id,
-                "style_id": style_id,
-                "seed": seed,
-                "component_id": component_id,
-                "component_type": component_type,
-            },
+        metadata = {
+            "ship_type_id": ship_type_id,
+            "style_id": style_id,
+            "seed": seed,
+            "component_id": component_id,
+            "component_type": component_type,
         }
         
+        metadata = json.dumps(metadata)
+        
         try:
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-        except IOError as e:
-            print(f"⚠ Warning: Failed to write cache file {cache_file}: {e}")
+            self._db.execute(
+                f"INSERT OR REPLACE INTO entries ({self._ENTRY_COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key, prompt, response, datetime.now(timezone.utc).isoformat(),
+                 model_name, metadata, time.time_ns(),
+                 self._entry_size(prompt, response, metadata)),
+            )
+            if self.max_bytes is not None:
+                self._evict(keep=cache_key)
+        except sqlite3.Error as e:
+            print(f"⚠ Warning: Failed to write cache entry {cache_key}: {e}")
+            return
+        
+        if self.embedder is not None:
+            vector = self._pending_vectors.pop(prompt, None)
+            if vector is None:
+                vector = self._embed(prompt)
+            if vector is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                        (cache_key, component_type, vector.tobytes()),
+                    )
+                    self._vector_index = None
+                except sqlite3.Error as e:
+                    print(f"⚠ Warning: Failed to write cache embedding {cache_key}: {e}")
     
     def clear(self):
         """Clear all cached descriptions."""
-        if not self.enabled or not self.cache_dir.exists():
+        if not self.enabled:
             return
         
-        count = 0
-        for cache_file in self.cache_dir.glob("*.json"):
-            try:
-                cache_file.unlink()
-                count += 1
-            except OSError as e:
-                print(f"⚠ Warning: Failed to delete {cache_file}: {e}")
+        try:
+            count = self._db.execute("DELETE FROM entries").rowcount
+            self._db.execute("DELETE FROM embeddings")
+            self._vector_index = None
+            self._db.execute("VACUUM")
+        except sqlite3.Error as e:
+            print(f"⚠ Warning: Failed to clear cache {self.db_path}: {e}")
+            return
         
         print(f"✓ Cleared {count} cached descriptions")
     
+    def export_json(self, output_dir: str) -> int:
+        """Write every entry as a <cache_key>.json file in the old per-file layout.
+        
+        For tools that read the pre-SQLite cache format. Don't export into
+        cache_dir itself: files there are imported back into the database.
+        
+        Args:
+            output_dir: Directory to write the JSON files to
+            
+        Returns:
+            Number of entries exported
+        """
+        if not self.enabled:
+            return 0
+        
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        count = 0
+        for cache_key, prompt, response, timestamp, model_name, metadata in self._db.execute(
+            "SELECT cache_key, prompt, response, timestamp, model_name, metadata FROM entries"
+        ):
+            data = {
+                "prompt": prompt,
+                "response": response,
+                "timestamp": timestamp,
+                "model_name": model_name,
+                "cache_key": cache_key,
+                "metadata": json.loads(metadata) if metadata else {},
+            }
+            with open(output_dir / f"{cache_key}.json", "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            count += 1
+        
+        return count
+    
     def stats(self) -> dict:
         """Get cache statistics.
         
         Returns:
             Dictionary with cache stats (total_entries, total_size_bytes)
         """
-        if not self.enabled or not self.cache_dir.exists():
+        if not self.enabled:
             return {"total_entries": 0, "total_size_bytes": 0}
         
-        cache_files = list(self.cache_dir.glob("*.json"))
-        total_size = sum(f.stat().st_size for f in cache_files)
+        total_entries, total_size = self._db.execute(
+            "SELECT count(*), coalesce(sum(size), 0) FROM entries"
+        ).fetchone()
         
         return {
-            "total_entries": len(cache_files),
+            "total_entries": total_entries,
             "total_size_bytes": total_size,
             "total_size_mb": round(total_size / (1024 * 1024), 2),
         }
@@ -1,8 +1,10 @@
 """Description generation pipeline using LLM and caching."""
 
-from datetime import datetime
-from typing import Optional
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Optional, Union
 from pathlib import Path
+import hashlib
 import json
 
 from ..data.models import (
@@ -11,7 +13,7 @@ from ..data.models import (
     DescriptionManifest,
 )
 from ..data.loader import get_loader
-from .llm import OllamaClient, LLMConfig
+from .llm import OllamaClient, VLLMClient
 from .cache import DescriptionCache
 from .prompts import PromptBuilder, get_camera_angles
 
@@ -21,19 +23,24 @@ class DescriptionGenerator:
     
     def __init__(
         self,
-        llm_client: Optional[OllamaClient] = None,
+        llm_client: Optional[Union[OllamaClient, VLLMClient]] = None,
         cache: Optional[DescriptionCache] = None,
         prompt_builder: Optional[PromptBuilder] = None,
+        semantic_cache: bool = False,
     ):
         """Initialize description generator.
         
         Args:
-            llm_client: Ollama client (creates default if None)
+            llm_client: Ollama or vLLM client (creates an OllamaClient if None)
             cache: Description cache (creates default if None)
             prompt_builder: Prompt builder (creates default if None)
+            semantic_cache: Let the default cache match near-identical prompts
+                via the LLM client's embeddings (ignored if cache is given)
         """
         self.llm = llm_client or OllamaClient()
-        self.cache = cache or DescriptionCache()
+        self.cache = cache or DescriptionCache(
+            embedder=self.llm.embed if semantic_cache else None
+        )
         self.prompts = prompt_builder or PromptBuilder()
         self.loader = get_loader()
         
@@ -64,10 +71,14 @@ class DescriptionGenerator:
         components = []
         cache_misses = []
         
-        # Process rooms
+        # Look each distinct room template up once; the structural and light
+        # passes below reuse these instead of re-fetching per placed room
         unique_rooms = set(placed_room.room_id for placed_room in structure.rooms)
-        for room_id in unique_rooms:
-            room = self.loader.get_room(room_id)
+        rooms_by_id = {room_id: self.loader.get_room(room_id) for room_id in unique_rooms}
+        
+        # Process rooms
+        for room_id, room in rooms_by_id.items():
+            prompt = self.prompts.build_room_prompt(room, style, ship_type)
             
             # Check cache first
             cached = None
@@ -78,6 +89,7 @@ class DescriptionGenerator:
                     seed=structure.seed or 0,
                     component_id=room_id,
                     component_type="room",
+                    prompt=prompt,
                 )
             
             if cached:
@@ -93,8 +105,7 @@ class DescriptionGenerator:
                     )
                 )
             else:
-                # Build prompt and queue for generation
-                prompt = self.prompts.build_room_prompt(room, style, ship_type)
+                # Queue for generation
                 cache_misses.append({
                     "component_id": room_id,
                     "component_type": "room",
@@ -110,6 +121,10 @@ class DescriptionGenerator:
                 
                 # Create unique component ID (facility_id + variant)
                 component_id = f"{facility_id}_{variant_id}" if variant_id else facility_id
+                facility = self.loader.get_facility(facility_id)
+                prompt = self.prompts.build_facility_prompt(
+                    facility, style, ship_type, variant_id
+                )
                 
                 # Check cache
                 cached = None
@@ -120,11 +135,11 @@ class DescriptionGenerator:
                         seed=structure.seed or 0,
                         component_id=component_id,
                         component_type="facility",
+                        prompt=prompt,
                     )
                 
                 if cached:
                     print(f"  [OK] Facility '{facility_id}' (cached)")
-                    facility = self.loader.get_facility(facility_id)
                     components.append(
                         ComponentDescription(
                             component_id=component_id,
@@ -136,11 +151,7 @@ class DescriptionGenerator:
                         )
                     )
                 else:
-                    # Build prompt and queue for generation
-                    facility = self.loader.get_facility(facility_id)
-                    prompt = self.prompts.build_facility_prompt(
-                        facility, style, ship_type, variant_id
-                    )
+                    # Queue for generation
                     cache_misses.append({
                         "component_id": component_id,
                         "component_type": "facility",
@@ -152,8 +163,7 @@ class DescriptionGenerator:
         if include_structural:
             # Collect unique structural elements from room geometries
             unique_structural = set()
-            for placed_room in structure.rooms:
-                room = self.loader.get_room(placed_room.room_id)
+            for room in rooms_by_id.values():
                 if room and room.geometry:
                     unique_structural.add(room.geometry.floor_element_id)
                     unique_structural.add(room.geometry.ceiling_element_id)
@@ -171,6 +181,7 @@ class DescriptionGenerator:
                 element = self.loader.get_structural_element(element_id)
                 if not element:
                     continue
+                prompt = self.prompts.build_structural_prompt(element, style, ship_type)
                 
                 # Check cache
                 cached = None
@@ -181,6 +192,7 @@ class DescriptionGenerator:
                         seed=structure.seed or 0,
                         component_id=element_id,
                         component_type="structural",
+                        prompt=prompt,
                     )
                 
                 if cached:
@@ -196,8 +208,7 @@ class DescriptionGenerator:
                         )
                     )
                 else:
-                    # Build prompt and queue for generation
-                    prompt = self.prompts.build_structural_prompt(element, style, ship_type)
+                    # Queue for generation
                     cache_misses.append({
                         "component_id": element_id,
                         "component_type": "structural",
@@ -215,19 +226,19 @@ class DescriptionGenerator:
                     variant_id = placed_light.variant_id
                     component_id = f"{light_id}_{variant_id}" if variant_id else light_id
                     unique_lights.add((light_id, variant_id, component_id))
-                
-                # Also add characteristic lights from room templates
-                room = self.loader.get_room(placed_room.room_id)
+            
+            # Also add characteristic lights from room templates
+            for room in rooms_by_id.values():
                 if room:
                     for light_id in room.characteristic_lights:
-                        if (light_id, None, light_id) not in unique_lights:
-                            unique_lights.add((light_id, None, light_id))
+                        unique_lights.add((light_id, None, light_id))
             
             # Generate descriptions for each unique light
             for light_id, variant_id, component_id in unique_lights:
                 light = self.loader.get_light_fixture(light_id)
                 if not light:
                     continue
+                prompt = self.prompts.build_light_prompt(light, style, ship_type, variant_id)
                 
                 # Check cache
                 cached = None
@@ -238,6 +249,7 @@ class DescriptionGenerator:
                         seed=structure.seed or 0,
                         component_id=component_id,
                         component_type="light",
+                        prompt=prompt,
                     )
                 
                 if cached:
@@ -253,8 +265,7 @@ class DescriptionGenerator:
                         )
                     )
                 else:
-                    # Build prompt and queue for generation
-                    prompt = self.prompts.build_light_prompt(light, style, ship_type, variant_id)
+                    # Queue for generation
                     cache_misses.append({
                         "component_id": component_id,
                         "component_type": "light",
@@ -264,12 +275,23 @@ class DescriptionGenerator:
         
         # Batch generate all cache misses
         if cache_misses:
-            print(f"  [GEN] Generating {len(cache_misses)} new descriptions...")
-            prompts = [item["prompt"] for item in cache_misses]
-            responses = self.llm.batch_generate(prompts)
+            # Identical prompts (e.g. the same facility placed in several rooms)
+            # need only one LLM call; the response is shared by every item
+            groups = defaultdict(list)
+            for item in cache_misses:
+                item["prompt_hash"] = hashlib.blake2b(
+                    item["prompt"].encode(), digest_size=16
+                ).hexdigest()
+                groups[item["prompt_hash"]].append(item)
             
-            # Store in cache and add to components
-            for item, response in zip(cache_misses, responses):
+            print(f"  [GEN] Generating {len(cache_misses)} new descriptions "
+                  f"({len(groups)} unique prompts)...")
+            prompts = [items[0]["prompt"] for items in groups.values()]
+            responses = dict(zip(groups, self.llm.batch_generate(prompts)))
+            
+            # Store in cache and add to components (in the original order)
+            for item in cache_misses:
+                response = responses[item["prompt_hash"]]
                 print(f"  [OK] {item['component_type'].title()} '{item['component_id']}' generated")
                 
                 # Cache the result
@@ -302,7 +324,7 @@ class DescriptionGenerator:
             ship_type_id=structure.ship_type_id,
             style_id=structure.style_id,
             seed=structure.seed or 0,
-            generation_timestamp=datetime.utcnow().isoformat(),
+            generation_timestamp=datetime.now(timezone.utc).isoformat(),
             model_name=self.llm.config.model,
             components=components,
         )
@@ -313,6 +335,10 @@ class DescriptionGenerator:
     def save_manifest(self, manifest: DescriptionManifest, output_path: str | Path):
         """Save description manifest to JSON file.
         
+        Components are serialized one at a time by pydantic's native JSON
+        encoder and written as they go (one per line), so the whole manifest
+        is never held as a nested dict.
+        
         Args:
             manifest: Description manifest to save
             output_path: Output file path
@@ -320,8 +346,16 @@ class DescriptionGenerator:
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
+        header = manifest.model_dump(mode="json", exclude={"components"})
         with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(manifest.model_dump(), f, indent=2)
+            f.write("{\n")
+            for key, value in header.items():
+                f.write(f"  {json.dumps(key)}: {json.dumps(value)},\n")
+            f.write('  "components": [')
+            for i, component in enumerate(manifest.components):
+                f.write(",\n    " if i else "\n    ")
+                f.write(component.model_dump_json())
+            f.write("\n  ]\n}\n" if manifest.components else "]\n}\n")
         
         print(f"[OK] Saved manifest to: {output_path}")
 
@@ -0,0 +1,115 @@
+"""Prompt embedding cache so re-runs skip the diffusion text encoder."""
+
+import hashlib
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import torch
+
+
+class PromptEmbeddingCache:
+    """Disk cache for text-encoder outputs, keyed by prompt text, model and variant."""
+
+    def __init__(self, cache_dir: str = ".cache/prompt_embeddings", enabled: bool = True):
+        """Initialize prompt embedding cache.
+
+        Args:
+            cache_dir: Directory to store cached embeddings
+            enabled: Whether caching is enabled
+        """
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _compute_cache_key(self, prompt: str, model_id: str, variant: str = "") -> str:
+        """Compute SHA256 cache key from prompt, model and encoder variant.
+
+        The seed is deliberately not part of the key: text encoding is
+        deterministic, so every seed shares the same embeddings. The variant
+        is, because quantized or lower-precision encoders give different tensors.
+
+        Args:
+            prompt: Prompt text fed to the text encoder
+            model_id: Model identifier (embeddings are model-specific)
+            variant: Encoder quantization mode and dtype, e.g. "quantize=fp8|dtype=bfloat16"
+
+        Returns:
+            Hex-encoded SHA256 hash
+        """
+        key_string = f"{model_id}|{variant}|{prompt}"
+        return hashlib.sha256(key_string.encode()).hexdigest()
+
+    def get(
+        self, prompt: str, model_id: str, device: str, variant: str = ""
+    ) -> Optional[Dict[str, torch.Tensor]]:
+        """Retrieve cached embeddings if available.
+
+        Args:
+            prompt: Prompt text
+            model_id: Model identifier
+            device: Device to load the tensors onto
+            variant: Encoder quantization mode and dtype
+
+        Returns:
+            Dict of embedding tensors if found, None otherwise
+        """
+        if not self.enabled:
+            return None
+
+        cache_file = self.cache_dir / f"{self._compute_cache_key(prompt, model_id, variant)}.pt"
+        if not cache_file.exists():
+            return None
+
+        try:
+            return torch.load(cache_file, map_location=device, weights_only=True, mmap=True)
+        except (RuntimeError, EOFError) as e:
+            print(f"⚠ Warning: Corrupted embedding cache file {cache_file}, ignoring: {e}")
+            return None
+
+    def set(
+        self, prompt: str, model_id: str, embeddings: Dict[str, torch.Tensor], variant: str = ""
+    ):
+        """Store embeddings in cache.
+
+        Args:
+            prompt: Prompt text
+            model_id: Model identifier
+            embeddings: Dict of tensors returned by the text encoder
+            variant: Encoder quantization mode and dtype
+        """
+        if not self.enabled:
+            return
+
+        cache_file = self.cache_dir / f"{self._compute_cache_key(prompt, model_id, variant)}.pt"
+        try:
+            torch.save({k: v.detach().cpu() for k, v in embeddings.items()}, cache_file)
+        except IOError as e:
+            print(f"⚠ Warning: Failed to write embedding cache file {cache_file}: {e}")
+
+    def get_or_encode(
+        self,
+        prompt: str,
+        model_id: str,
+        device: str,
+        encode: Callable[[str], Dict[str, torch.Tensor]],
+        variant: str = "",
+    ) -> Dict[str, torch.Tensor]:
+        """Return cached embeddings, running `encode(prompt)` on a miss.
+
+        Args:
+            prompt: Prompt text
+            model_id: Model identifier
+            device: Device to load cached tensors onto
+            encode: Text-encoder call producing the embedding dict
+            variant: Encoder quantization mode and dtype
+
+        Returns:
+            Dict of embedding tensors
+        """
+        embeddings = self.get(prompt, model_id, device, variant)
+        if embeddings is None:
+            embeddings = encode(prompt)
+            self.set(prompt, model_id, embeddings, variant)
+        return embeddings
@@ -1,12 +1,26 @@
 """FLUX.1-schnell image generator wrapper (Apache 2.0, fast variant)."""
 
+import json
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, List
+from typing import Any, Callable, Optional, List, Dict, Tuple
 import torch
 from PIL import Image
 from datetime import datetime
 
+from .embedding_cache import PromptEmbeddingCache
+
+
+# Background threads encoding batch_generate's PNGs (Pillow releases the GIL
+# while compressing)
+IMAGE_SAVE_WORKERS = 4
+
+
+def save_png(image: Image.Image, path: Path):
+    """Save with light zlib compression: several times faster, ~10% larger files."""
+    image.save(path, 'PNG', compress_level=1)
+
 
 @dataclass
 class FluxSchnellConfig:
@@ -16,16 +30,34 @@ class FluxSchnellConfig:
     num_inference_steps: int = 4  # Schnell is optimized for 1-4 steps
     guidance_scale: float = 0.0  # Schnell doesn't use CFG
     seed: Optional[int] = None
+    embedding_cache_dir: Optional[str] = ".cache/prompt_embeddings"  # None disables
+    quantize: str = "none"  # Transformer + T5 weight quantization: "none", "int8" or "fp8"
+    # Reuse quantized weights across runs (None disables)
+    quantized_cache_dir: Optional[str] = ".cache/quantized"
+    # Keep on GPU and replay denoise steps as CUDA graphs (no CPU offload)
+    cuda_graphs: bool = False
+    # Stream submodels to the GPU per call; False keeps the pipeline resident (~24GB bf16)
+    cpu_offload: bool = True
+    compile: bool = False  # torch.compile the transformer (warmed up once at load time)
+    low_vram: bool = False  # Attention slicing: lower peak VRAM, slower attention
+    batch_size: int = 4  # Prompts denoised together by batch_generate
 
 
 class FluxSchnellGenerator:
     """Wrapper for FLUX.1-schnell (Apache 2.0, fast variant)."""
     
+    # Pipeline components whose weights `quantize` applies to
+    QUANTIZED_COMPONENTS = ("transformer", "text_encoder_2")
+    
     def __init__(self, config: Optional[FluxSchnellConfig] = None):
         """Initialize FLUX.1-schnell generator with config."""
         self.config = config or FluxSchnellConfig()
         self.pipeline = None
         self._model_loaded = False
+        self.embedding_cache = PromptEmbeddingCache(
+            cache_dir=self.config.embedding_cache_dir or "",
+            enabled=self.config.embedding_cache_dir is not None,
+        )
         
     def _load_model(self):
         """Lazy load the FLUX.1-schnell model."""
@@ -37,21 +69,242 @@ class FluxSchnellGenerator:
         
         from diffusers import FluxPipeline
         
+        # Components quantized on an earlier run replace the bf16 checkpoint
+        quantized = self._load_quantized() if self.config.quantize != "none" else {}
+        
         # Load pipeline
         self.pipeline = FluxPipeline.from_pretrained(
             self.config.model_id,
-            torch_dtype=torch.bfloat16
+            torch_dtype=torch.bfloat16,
+            **quantized
         )
         
-        # Enable CPU offload to save VRAM
-        self.pipeline.enable_model_cpu_offload()
+        # Store transformer and T5 weights in 8 bits (CLIP and VAE stay bf16);
+        # must happen before CPU offload hooks are attached
+        if self.config.quantize != "none":
+            from optimum.quanto import freeze, qfloat8, qint8, quantize
+            weights = {"int8": qint8, "fp8": qfloat8}[self.config.quantize]
+            for name in self.QUANTIZED_COMPONENTS:
+                if name in quantized:
+                    continue
+                module = getattr(self.pipeline, name)
+                quantize(module, weights=weights)
+                freeze(module)
+                self._save_quantized(name, module)
+            print(f"[OK] Transformer and T5 weights quantized to {self.config.quantize}")
+        
+        if self.config.cpu_offload and not self.config.cuda_graphs:
+            # Move each submodel to the GPU only while it runs; fits small
+            # cards at the cost of host<->device copies on every call
+            self.pipeline.enable_model_cpu_offload()
+        else:
+            # Graph replay needs weights at fixed device addresses, so
+            # cuda_graphs always keeps the whole pipeline resident
+            self.pipeline.to("cuda")
         
-        # Enable memory-efficient attention
-        self.pipeline.enable_attention_slicing()
+        if self.config.low_vram:
+            self.pipeline.enable_attention_slicing()
+        
+        if self.config.compile or self.config.cuda_graphs:
+            # Resolution and step count are fixed per config, so every denoise
+            # step has the same shapes and the transformer compiles once.
+            # "reduce-overhead" additionally replays it as a CUDA graph,
+            # removing per-kernel launch overhead.
+            # Graphs are captured per input shape; dynamic=False keeps each
+            # (resolution, batch size) specialised instead of one dynamic graph
+            mode = "reduce-overhead" if self.config.cuda_graphs else "default"
+            self.pipeline.transformer = torch.compile(
+                self.pipeline.transformer, mode=mode, fullgraph=False,
+                dynamic=False if self.config.cuda_graphs else None,
+            )
+            self._warm_up()
         
         self._model_loaded = True
         print(f"[OK] FLUX.1-schnell loaded (4-step fast generation)")
     
+    def unload(self):
+        """Release the loaded pipeline and its VRAM; the next call loads it again."""
+        self.pipeline = None
+        self._model_loaded = False
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    
+    def _quantized_dir(self) -> Optional[Path]:
+        """Directory holding this model's quantized weights (None if caching is disabled)."""
+        if self.config.quantized_cache_dir is None:
+            return None
+        model_dir = self.config.model_id.replace("/", "--")
+        return Path(self.config.quantized_cache_dir) / model_dir / self.config.quantize
+    
+    def _load_quantized(self) -> Dict[str, torch.nn.Module]:
+        """Rebuild previously quantized components from the quantized cache.
+        
+        Modules are created on the meta device and filled straight from the
+        saved 8-bit state dict, so neither the bf16 weights nor the
+        quantization pass are needed again.
+        
+        Returns:
+            Dict of pipeline component name -> quantized module, for those cached
+        """
+        cache_dir = self._quantized_dir()
+        if cache_dir is None:
+            return {}
+        
+        from diffusers import FluxTransformer2DModel
+        from transformers import T5Config, T5EncoderModel
+        
+        builders = {
+            "transformer": lambda: FluxTransformer2DModel.from_config(
+                FluxTransformer2DModel.load_config(self.config.model_id, subfolder="transformer")
+            ),
+            "text_encoder_2": lambda: T5EncoderModel(
+                T5Config.from_pretrained(self.config.model_id, subfolder="text_encoder_2")
+            ),
+        }
+        
+        components = {}
+        for name in self.QUANTIZED_COMPONENTS:
+            weights_file = cache_dir / f"{name}.safetensors"
+            qmap_file = cache_dir / f"{name}.qmap.json"
+            if not (weights_file.exists() and qmap_file.exists()):
+                continue
+            try:
+                module = self._read_quantized(builders[name], weights_file, qmap_file)
+            except (OSError, ValueError, RuntimeError) as e:
+                print(
+                    f"⚠ Warning: Ignoring unreadable quantized weights in {cache_dir} ({name}): {e}"
+                )
+                continue
+            components[name] = module
+            print(f"[OK] Loaded {self.config.quantize} {name} from {weights_file}")
+        return components
+    
+    @staticmethod
+    def _read_quantized(
+        build: Callable[[], torch.nn.Module], weights_file: Path, qmap_file: Path
+    ) -> torch.nn.Module:
+        """Build a module on the meta device and fill it from saved quantized weights.
+        
+        requantize() gives every parameter its own storage, so tied weights
+        (T5's shared / encoder.embed_tokens embedding) are re-tied afterwards
+        from the aliases recorded by _save_quantized.
+        """
+        from optimum.quanto import requantize
+        from safetensors import safe_open
+        from safetensors.torch import load_file
+        
+        with open(qmap_file, "r", encoding="utf-8") as f:
+            qmap = json.load(f)
+        with safe_open(str(weights_file), framework="pt") as f:
+            tied = json.loads((f.metadata() or {}).get("tied", "{}"))
+        
+        with torch.device("meta"):
+            module = build().to(torch.bfloat16)
+        requantize(module, load_file(weights_file), qmap, device=torch.device("cpu"))
+        
+        for alias, source in tied.items():
+            owner_name, _, attr = alias.rpartition(".")
+            setattr(module.get_submodule(owner_name), attr, module.get_parameter(source))
+        return module.eval()
+    
+    @staticmethod
+    def _untie(
+        state_dict: Dict[str, torch.Tensor]
+    ) -> Tuple[Dict[str, torch.Tensor], Dict[str, str]]:
+        """Drop tensors that share storage with an earlier one (safetensors rejects them).
+        
+        Returns:
+            (state dict without the aliases, alias name -> name of the tensor kept)
+        """
+        kept, tied, seen = {}, {}, {}
+        for key, tensor in state_dict.items():
+            try:
+                storage = (
+                    tensor.untyped_storage().data_ptr(), tensor.storage_offset(), tensor.shape
+                )
+            except (RuntimeError, NotImplementedError):
+                # Quantized tensor subclasses: never tied
+                kept[key] = tensor
+                continue
+            if storage in seen:
+                tied[key] = seen[storage]
+            else:
+                seen[storage] = key
+                kept[key] = tensor
+        return kept, tied
+    
+    def _save_quantized(self, name: str, module: torch.nn.Module):
+        """Write a freshly quantized component to the quantized cache."""
+        cache_dir = self._quantized_dir()
+        if cache_dir is None:
+            return
+        
+        from optimum.quanto import quantization_map
+        from safetensors.torch import save_file
+        
+        state_dict, tied = self._untie(module.state_dict())
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            save_file(
+                state_dict, cache_dir / f"{name}.safetensors", metadata={"tied": json.dumps(tied)}
+            )
+            with open(cache_dir / f"{name}.qmap.json", "w", encoding="utf-8") as f:
+                json.dump(quantization_map(module), f)
+        except (OSError, RuntimeError) as e:
+            print(f"⚠ Warning: Failed to cache quantized {name} in {cache_dir}: {e}")
+    
+    def _warm_up(self):
+        """Run throwaway generations so compilation isn't paid by the first real call.
+        
+        With cuda_graphs this also captures the graph for batch_generate's
+        micro-batch shape, not just generate()'s single image.
+        """
+        print("Compiling FLUX.1-schnell transformer (one-time warm-up)...")
+        batch_sizes = {1}
+        if self.config.cuda_graphs:
+            batch_sizes.add(self.config.batch_size)
+        for batch_size in sorted(batch_sizes):
+            self.pipeline(
+                prompt=["warm-up"] * batch_size,
+                num_inference_steps=self.config.num_inference_steps,
+                guidance_scale=self.config.guidance_scale,
+                height=self.config.resolution,
+                width=self.config.resolution,
+                output_type="latent",
+            )
+        print("[OK] Transformer compiled")
+    
+    def _encode_prompt(self, text: str) -> Dict[str, torch.Tensor]:
+        """Run the CLIP + T5 text encoders for a single prompt."""
+        prompt_embeds, pooled_prompt_embeds, _ = self.pipeline.encode_prompt(
+            prompt=text,
+            prompt_2=None,
+            device=self.pipeline._execution_device,
+        )
+        return {"prompt_embeds": prompt_embeds, "pooled_prompt_embeds": pooled_prompt_embeds}
+    
+    def _embedding_variant(self) -> str:
+        """Embedding cache variant: a quantized T5 encodes prompts differently."""
+        return f"quantize={self.config.quantize}|dtype=bfloat16"
+    
+    def _batched_prompt_kwargs(self, prompts: List[str]) -> Dict[str, Any]:
+        """Build prompt arguments for a batch of prompts.
+        
+        T5 embeddings are always padded to the same sequence length, so cached
+        per-prompt embeddings stack directly along the batch dimension.
+        """
+        if not self.embedding_cache.enabled:
+            return {"prompt": prompts}
+        
+        embeddings = [
+            self.embedding_cache.get_or_encode(
+                p, self.config.model_id, self.pipeline._execution_device, self._encode_prompt,
+                self._embedding_variant(),
+            )
+            for p in prompts
+        ]
+        return {key: torch.cat([e[key] for e in embeddings]) for key in embeddings[0]}
+    
     def generate(
         self,
         prompt: str,
@@ -80,9 +333,18 @@ class FluxSchnellGenerator:
         generator = torch.Generator("cuda" if torch.cuda.is_available() else "cpu")
         generator.manual_seed(seed)
         
+        # Reuse cached text embeddings when available
+        if self.embedding_cache.enabled:
+            prompt_kwargs = self.embedding_cache.get_or_encode(
+                prompt, self.config.model_id, self.pipeline._execution_device, self._encode_prompt,
+                self._embedding_variant(),
+            )
+        else:
+            prompt_kwargs = {"prompt": prompt}
+        
         # Generate image
         result = self.pipeline(
-            prompt=prompt,
+            **prompt_kwargs,
             num_inference_steps=self.config.num_inference_steps,
             guidance_scale=self.config.guidance_scale,
             height=self.config.resolution,
@@ -96,7 +358,7 @@ class FluxSchnellGenerator:
         if output_path:
             output_path = Path(output_path)
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            image.save(output_path, 'PNG')
+            save_png(image, output_path)
         
         return {
             'image': image,
@@ -107,19 +369,154 @@ class FluxSchnellGenerator:
             'timestamp': datetime.now().isoformat()
         }
     
+    def _denoise(self, prompts: List[str], seeds: List[int]) -> List[Image.Image]:
+        """Run one pipeline call over `prompts`, one generator per image.
+        
+        One generator per image keeps each result identical to generating it
+        on its own with that seed.
+        """
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        generators = [torch.Generator(device).manual_seed(s) for s in seeds]
+        
+        # A short final batch would capture a new CUDA graph for its
+        # shape; pad it with copies of its last prompt and discard those
+        padded = prompts
+        if self.config.cuda_graphs and len(prompts) < self.config.batch_size:
+            padding = self.config.batch_size - len(prompts)
+            padded = prompts + [prompts[-1]] * padding
+            generators += [torch.Generator(device).manual_seed(seeds[-1]) for _ in range(padding)]
+        
+        output = self.pipeline(
+            **self._batched_prompt_kwargs(padded),
+            num_inference_steps=self.config.num_inference_steps,
+            guidance_scale=self.config.guidance_scale,
+            height=self.config.resolution,
+            width=self.config.resolution,
+            generator=generators,
+        )
+        return output.images[:len(prompts)]
+    
+    def generate_images(
+        self,
+        prompts: List[str],
+        negative_prompt: Optional[str] = None,
+        seeds: Optional[List[int]] = None,
+    ) -> List[dict]:
+        """
+        Generate one image per prompt in memory, without writing any files.
+        Prompts are denoised config.batch_size at a time in a single pipeline call.
+        
+        Args:
+            prompts: List of text descriptions
+            negative_prompt: Not used by schnell, kept for compatibility
+            seeds: Per-prompt random seeds (random when None)
+            
+        Returns:
+            List of generation results (see generate()), in prompt order
+        """
+        self._load_model()
+        
+        if seeds is None:
+            seeds = [torch.randint(0, 2**32, (1,)).item() for _ in prompts]
+        
+        results = []
+        batch_size = self.config.batch_size
+        for start in range(0, len(prompts), batch_size):
+            batch = prompts[start:start + batch_size]
+            batch_seeds = seeds[start:start + batch_size]
+            images = self._denoise(batch, batch_seeds)
+            for prompt, prompt_seed, image in zip(batch, batch_seeds, images):
+                results.append({
+                    'image': image,
+                    'path': None,
+                    'seed': prompt_seed,
+                    'prompt': prompt,
+                    'resolution': (self.config.resolution, self.config.resolution),
+                    'timestamp': datetime.now().isoformat()
+                })
+        return results
+    
+    def save_image(self, result: dict, output_path: Path, save_metadata: bool = True):
+        """
+        Save a generated image, with its generation metadata as JSON alongside.
+        
+        Args:
+            result: Generation result from generate() or generate_images()
+            output_path: Path to save image (should end in .png)
+            save_metadata: Whether to save metadata JSON alongside image
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        save_png(result['image'], output_path)
+        
+        if save_metadata:
+            metadata = {k: v for k, v in result.items() if k not in ('image', 'path')}
+            metadata['model'] = self.config.model_id
+            with open(output_path.with_suffix('.json'), 'w') as f:
+                json.dump(metadata, f, indent=2)
+    
     def batch_generate(
         self,
         prompts: List[str],
         output_dir: Path,
-        **kwargs
+        negative_prompt: Optional[str] = None,
+        seed: Optional[int] = None,
+        batch_size: Optional[int] = None,
     ) -> List[dict]:
-        """Generate multiple images from list of prompts."""
+        """
+        Generate multiple images from a list of prompts.
+        Prompts are denoised `batch_size` at a time in a single pipeline call,
+        so each step runs the transformer over the whole batch.
+        
+        Args:
+            prompts: List of text descriptions
+            output_dir: Directory for image_000.png, image_001.png, ...
+            negative_prompt: Not used by schnell, kept for compatibility
+            seed: Base random seed (incremented for each prompt)
+            batch_size: Prompts per pipeline call (defaults to config.batch_size)
+            
+        Returns:
+            List of generation results, in prompt order
+        """
+        self._load_model()
+        
+        batch_size = batch_size or self.config.batch_size
+        if seed is None:
+            seed = self.config.seed
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # PNG encoding runs on background threads, so the GPU starts the next
+        # micro-batch while the previous one is still being written
         results = []
+        saves = []
+        with ThreadPoolExecutor(max_workers=IMAGE_SAVE_WORKERS) as io_pool:
+            for start in range(0, len(prompts), batch_size):
+                batch = prompts[start:start + batch_size]
+                if seed is not None:
+                    seeds = [seed + start + i for i in range(len(batch))]
+                else:
+                    seeds = [torch.randint(0, 2**32, (1,)).item() for _ in batch]
+                
+                print(f"Generating images {start+1}-{start+len(batch)}/{len(prompts)}...")
+                images = self._denoise(batch, seeds)
+                
+                for i, (prompt, prompt_seed, image) in enumerate(
+                    zip(batch, seeds, images), start
+                ):
+                    output_path = output_dir / f"image_{i:03d}.png"
+                    saves.append(io_pool.submit(save_png, image, output_path))
+                    results.append({
+                        'image': image,
+                        'path': str(output_path),
+                        'seed': prompt_seed,
+                        'prompt': prompt,
+                        'resolution': (self.config.resolution, self.config.resolution),
+                        'timestamp': datetime.now().isoformat()
+                    })
         
-        for i, prompt in enumerate(prompts):
-            output_path = output_dir / f"image_{i:03d}.png"
-            result = self.generate(prompt, output_path=output_path, **kwargs)
-            results.append(result)
+        # Surface any failed write
+        for save in saves:
+            save.result()
         
         return results
-
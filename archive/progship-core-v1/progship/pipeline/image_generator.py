@@ -3,13 +3,16 @@ Image generation using Flux.2 [klein] 9B model.
 Converts text descriptions into concept art images.
 """
 
+from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import json
 from datetime import datetime
 import torch
 
+from .embedding_cache import PromptEmbeddingCache
+
 
 @dataclass
 class ImageConfig:
@@ -23,6 +26,11 @@ class ImageConfig:
     seed: Optional[int] = None
     device: str = "cuda" if torch.cuda.is_available() else "cpu"
     dtype: str = "float16"  # Use fp16 for quantized model
+    batch_size: int = 2  # Prompts denoised together by batch_generate (2-4 fits 24GB at 1024²)
+    embedding_cache_dir: Optional[str] = ".cache/prompt_embeddings"  # None disables
+    # "fp8": torchao float8 transformer (needs a bf16 model_id, not the bnb-4bit default)
+    quantize: str = "none"
+    compile: bool = False  # torch.compile(max-autotune) the transformer, warmed up at load time
 
 
 class QwenImageGenerator:
@@ -43,6 +51,12 @@ class QwenImageGenerator:
         self.config = config or ImageConfig()
         self.pipeline = None
         self._model_loaded = False
+        # Reused (re-seeded) RNGs, one per image slot in a batch
+        self._generators: List[torch.Generator] = []
+        self.embedding_cache = PromptEmbeddingCache(
+            cache_dir=self.config.embedding_cache_dir or "",
+            enabled=self.config.embedding_cache_dir is not None,
+        )
         
     def _load_model(self):
         """Lazy load the model to avoid startup delays."""
@@ -54,8 +68,7 @@ class QwenImageGenerator:
         
         from diffusers import DiffusionPipeline
         
-        # Convert dtype string to torch dtype
-        dtype = torch.bfloat16 if self.config.dtype == "bfloat16" else torch.float16
+        dtype = getattr(torch, self._dtype_name())
         
         # Load 4-bit quantized pipeline (no CPU offload needed!)
         self.pipeline = DiffusionPipeline.from_pretrained(
@@ -63,12 +76,130 @@ class QwenImageGenerator:
             torch_dtype=dtype,
         )
         self.pipeline = self.pipeline.to(self.config.device)
+        # No per-step tqdm callback; no safety checker pass over each output
+        self.pipeline.set_progress_bar_config(disable=True)
+        if hasattr(self.pipeline, "safety_checker"):
+            self.pipeline.safety_checker = None
+        
+        if self.config.quantize == "fp8":
+            # Dynamic float8 activations x float8 weights run the transformer's
+            # matmuls on FP8 tensor cores (Ada/Hopper)
+            if getattr(self.pipeline.transformer, "hf_quantizer", None) is not None:
+                raise ValueError(
+                    f"quantize='fp8' needs an unquantized (bf16) model, "
+                    f"but {self.config.model_id} is already quantized"
+                )
+            from torchao.quantization import float8_dynamic_activation_float8_weight, quantize_
+            quantize_(self.pipeline.transformer, float8_dynamic_activation_float8_weight())
+            print("[OK] Transformer quantized to float8 (torchao)")
+        
+        if self.config.compile:
+            self.pipeline.transformer = torch.compile(
+                self.pipeline.transformer, mode="max-autotune", fullgraph=False
+            )
+            self._warm_up()
         
         self._model_loaded = True
         print(f"[OK] Qwen-Image-2512-4bit loaded on {self.config.device}")
         print(f"[OK] Using 4-bit quantization for 24GB VRAM compatibility")
         print(f"[OK] Using {dtype} precision for optimal quality")
     
+    def _run_pipeline(self, **kwargs):
+        """Call the pipeline under inference mode, with attention limited to
+        SDPA's fused kernels on CUDA.
+        
+        Inference mode skips autograd's version-counter bookkeeping on every
+        tensor op. FlashAttention (or the memory-efficient kernel where masks
+        rule Flash out) never materializes the full attention matrix; this
+        keeps SDPA from silently falling back to the unfused math path.
+        """
+        with torch.inference_mode():
+            if not str(self.config.device).startswith("cuda"):
+                return self.pipeline(**kwargs)
+            
+            from torch.nn.attention import SDPBackend, sdpa_kernel
+            with sdpa_kernel([SDPBackend.FLASH_ATTENTION, SDPBackend.EFFICIENT_ATTENTION]):
+                return self.pipeline(**kwargs)
+    
+    def _seeded_generators(self, seeds: List[int]) -> List[torch.Generator]:
+        """Re-seed one cached generator per seed, creating only the missing ones.
+        
+        Not thread-safe; concurrent callers serialize through model_registry.generator_lock.
+        """
+        while len(self._generators) < len(seeds):
+            self._generators.append(torch.Generator(device=self.config.device))
+        return [g.manual_seed(s) for g, s in zip(self._generators, seeds)]
+    
+    def unload(self):
+        """Release the loaded pipeline and its VRAM; the next call loads it again."""
+        self.pipeline = None
+        self._model_loaded = False
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    
+    def _warm_up(self):
+        """Run one throwaway denoise step so autotuning isn't paid by the first real call."""
+        print("Compiling Qwen-Image transformer (one-time max-autotune warm-up)...")
+        _, width, height = self._resolve_size(None)
+        self._run_pipeline(
+            prompt="warm-up",
+            negative_prompt="warm-up",
+            width=width,
+            height=height,
+            num_inference_steps=1,
+            true_cfg_scale=self.config.true_cfg_scale,
+            output_type="latent",
+        )
+        print("[OK] Transformer compiled")
+    
+    def _resolve_size(self, aspect_ratio: Optional[str]) -> Tuple[str, int, int]:
+        """Resolve an aspect ratio preset (or the config default) to (ratio, width, height)."""
+        ar = aspect_ratio or self.config.aspect_ratio
+        if ar in self.ASPECT_RATIOS:
+            width, height = self.ASPECT_RATIOS[ar]
+        else:
+            width = height = self.config.resolution
+        return ar, width, height
+    
+    def _encode_prompt(self, text: str) -> Dict[str, Any]:
+        """Run the Qwen text encoder for a single prompt."""
+        prompt_embeds, prompt_embeds_mask = self.pipeline.encode_prompt(
+            prompt=text,
+            device=self.pipeline._execution_device,
+        )
+        return {"prompt_embeds": prompt_embeds, "prompt_embeds_mask": prompt_embeds_mask}
+    
+    def _dtype_name(self) -> str:
+        """Pipeline dtype name (float8 matmuls take bf16 activations)."""
+        if self.config.dtype == "bfloat16" or self.config.quantize == "fp8":
+            return "bfloat16"
+        return "float16"
+    
+    def _embedding_variant(self) -> str:
+        """Embedding cache variant: the encoder's dtype changes its outputs."""
+        return f"quantize={self.config.quantize}|dtype={self._dtype_name()}"
+    
+    def _prompt_kwargs(self, prompt: str, negative_prompt: Optional[str]) -> Dict[str, Any]:
+        """Build the prompt arguments for the pipeline, via the embedding cache if enabled."""
+        if not self.embedding_cache.enabled:
+            return {"prompt": prompt, "negative_prompt": negative_prompt}
+        
+        device = self.pipeline._execution_device
+        variant = self._embedding_variant()
+        kwargs = self.embedding_cache.get_or_encode(
+            prompt, self.config.model_id, device, self._encode_prompt, variant
+        )
+        if negative_prompt is not None:
+            negative = self.embedding_cache.get_or_encode(
+                negative_prompt, self.config.model_id, device, self._encode_prompt, variant
+            )
+            kwargs = {
+                **kwargs,
+                "negative_prompt_embeds": negative["prompt_embeds"],
+                "negative_prompt_embeds_mask": negative["prompt_embeds_mask"],
+            }
+        return kwargs
+    
     def generate(
         self, 
         prompt: str, 
@@ -93,22 +224,17 @@ class QwenImageGenerator:
         self._load_model()
         
         # Resolve dimensions (aspect ratio overrides resolution)
-        ar = aspect_ratio or self.config.aspect_ratio
-        if ar in self.ASPECT_RATIOS:
-            width, height = self.ASPECT_RATIOS[ar]
-        else:
-            width = height = self.config.resolution
+        ar, width, height = self._resolve_size(aspect_ratio)
         
         # Use provided seed or config seed
         actual_seed = seed if seed is not None else self.config.seed
         generator = None
         if actual_seed is not None:
-            generator = torch.Generator(device=self.config.device).manual_seed(actual_seed)
+            generator = self._seeded_generators([actual_seed])[0]
         
         # Generate image with Qwen-specific parameters
-        result = self.pipeline(
-            prompt=prompt,
-            negative_prompt=negative_prompt,
+        result = self._run_pipeline(
+            **self._prompt_kwargs(prompt, negative_prompt),
             width=width,
             height=height,
             num_inference_steps=self.config.num_inference_steps,
@@ -134,37 +260,136 @@ class QwenImageGenerator:
             }
         }
     
+    def _batched_prompt_kwargs(
+        self, prompts: List[str], negative_prompt: Optional[str]
+    ) -> Dict[str, Any]:
+        """Build prompt arguments for a batch of prompts sharing one negative prompt.
+        
+        Cached embeddings have per-prompt sequence lengths, so they are
+        zero-padded (mask included) to the longest one, as encode_prompt
+        does for a list of prompts.
+        """
+        if not self.embedding_cache.enabled:
+            negative = [negative_prompt] * len(prompts) if negative_prompt is not None else None
+            return {"prompt": prompts, "negative_prompt": negative}
+        
+        def stack(embeddings: List[Dict[str, Any]]) -> Dict[str, torch.Tensor]:
+            max_len = max(e["prompt_embeds"].shape[1] for e in embeddings)
+            embeds, masks = [], []
+            for e in embeddings:
+                pad = max_len - e["prompt_embeds"].shape[1]
+                embeds.append(torch.nn.functional.pad(e["prompt_embeds"], (0, 0, 0, pad)))
+                masks.append(torch.nn.functional.pad(e["prompt_embeds_mask"], (0, pad)))
+            return {"prompt_embeds": torch.cat(embeds), "prompt_embeds_mask": torch.cat(masks)}
+        
+        kwargs = stack([self._prompt_kwargs(p, None) for p in prompts])
+        if negative_prompt is not None:
+            negative = stack([self._prompt_kwargs(negative_prompt, None)] * len(prompts))
+            kwargs["negative_prompt_embeds"] = negative["prompt_embeds"]
+            kwargs["negative_prompt_embeds_mask"] = negative["prompt_embeds_mask"]
+        return kwargs
+    
     def batch_generate(
         self, 
         prompts: List[str], 
         negative_prompt: Optional[str] = None,
         seed: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        aspect_ratios: Optional[List[Optional[str]]] = None,
+        seeds: Optional[List[int]] = None,
         **kwargs
     ) -> List[Dict[str, Any]]:
         """
         Generate multiple images from a list of prompts.
-        Note: This processes prompts sequentially, not in parallel batches.
+        Prompts are denoised `batch_size` at a time in a single pipeline call,
+        so each step runs the transformer over the whole batch. Prompts with
+        different aspect ratios are grouped by resolution first, since one
+        call can only denoise latents of a single shape.
         
         Args:
             prompts: List of text descriptions
             negative_prompt: Things to avoid (applied to all)
             seed: Base random seed (incremented for each prompt)
+            batch_size: Prompts per pipeline call (defaults to config.batch_size)
+            aspect_ratios: Per-prompt aspect ratio presets (None entries use the config default)
+            seeds: Per-prompt seeds (overrides seed)
             **kwargs: Additional parameters
             
         Returns:
-            List of generation results
+            List of generation results, in prompt order
         """
-        results = []
-        for i, prompt in enumerate(prompts):
-            # Increment seed for variation
-            prompt_seed = (seed + i) if seed is not None else None
-            
-            print(f"Generating image {i+1}/{len(prompts)}: {prompt[:60]}...")
-            result = self.generate(prompt, negative_prompt, prompt_seed, **kwargs)
-            results.append(result)
+        self._load_model()
+        
+        batch_size = batch_size or self.config.batch_size
+        if aspect_ratios is None:
+            aspect_ratios = [None] * len(prompts)
+        
+        # Bucket prompt indices by resolved (width, height), keeping the
+        # ratio label each prompt asked for
+        buckets: Dict[Tuple[int, int], List[Tuple[int, str]]] = defaultdict(list)
+        for i, aspect_ratio in enumerate(aspect_ratios):
+            ar, width, height = self._resolve_size(aspect_ratio)
+            buckets[(width, height)].append((i, ar))
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(prompts)
+        done = 0
+        for (width, height), members in buckets.items():
+            for start in range(0, len(members), batch_size):
+                chunk = members[start:start + batch_size]
+                batch = [prompts[i] for i, _ in chunk]
+                # Seeds follow prompt order (one generator per image keeps each
+                # result identical to generating it on its own)
+                if seeds is not None:
+                    chunk_seeds = [seeds[i] for i, _ in chunk]
+                else:
+                    chunk_seeds = [(seed + i) if seed is not None else None for i, _ in chunk]
+                generator = None
+                if seeds is not None or seed is not None:
+                    generator = self._seeded_generators(chunk_seeds)
+                
+                print(f"Generating images {done+1}-{done+len(batch)}/{len(prompts)} "
+                      f"({width}x{height})...")
+                output = self._run_pipeline(
+                    **self._batched_prompt_kwargs(batch, negative_prompt),
+                    width=width,
+                    height=height,
+                    num_inference_steps=self.config.num_inference_steps,
+                    guidance_scale=self.config.guidance_scale,
+                    true_cfg_scale=self.config.true_cfg_scale,  # Qwen-specific
+                    generator=generator,
+                    **kwargs
+                )
+                done += len(batch)
+                
+                for (i, ar), prompt_seed, image in zip(chunk, chunk_seeds, output.images):
+                    results[i] = {
+                        "image": image,
+                        "prompt": prompts[i],
+                        "negative_prompt": negative_prompt,
+                        "seed": prompt_seed,
+                        "metadata": {
+                            "model": self.config.model_id,
+                            "resolution": f"{width}x{height}",
+                            "aspect_ratio": ar,
+                            "steps": self.config.num_inference_steps,
+                            "guidance_scale": self.config.guidance_scale,
+                            "true_cfg_scale": self.config.true_cfg_scale,
+                            "batch_size": len(batch),
+                            "timestamp": datetime.now().isoformat(),
+                        }
+                    }
             
         return results
     
+    def generate_images(
+        self,
+        prompts: List[str],
+        negative_prompt: Optional[str] = None,
+        seeds: Optional[List[int]] = None
+    ) -> List[Dict[str, Any]]:
+        """Generate one image per prompt in memory (see batch_generate)."""
+        return self.batch_generate(prompts, negative_prompt=negative_prompt, seeds=seeds)
+    
     def save_image(
         self, 
         result: Dict[str, Any], 
@@ -182,8 +407,8 @@ class QwenImageGenerator:
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Save image
-        result["image"].save(output_path)
+        # Save image (light zlib compression: several times faster, ~10% larger)
+        result["image"].save(output_path, compress_level=1)
         
         # Save metadata if requested
         if save_metadata:
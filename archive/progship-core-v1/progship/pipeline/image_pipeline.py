@@ -3,15 +3,95 @@ Image generation pipeline for ship components.
 Converts text descriptions into concept art images.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Union
 import json
+import os
 from datetime import datetime
 from tqdm import tqdm
 
 from progship.data.models import DescriptionManifest, ComponentDescription
-from progship.pipeline.model_registry import create_generator, ModelType
+from progship.pipeline.model_registry import (
+    get_generator, generator_lock, generate_images, save_generated_image,
+    ModelType, QUANTIZABLE_MODELS, CUDA_GRAPH_MODELS
+)
 from progship.pipeline.image_generator import ImageConfig
+from progship.pipeline.inference_server import InferenceServer
+from progship.pipeline.image_processing import write_json
+
+
+# Default CUDA caching-allocator settings for image generation. Expandable
+# segments let the allocator grow blocks in place as the working set shifts
+# between transformer steps and VAE decode, instead of cudaMalloc/cudaFree churn
+# and fragmentation; large blocks are never split. PyTorch reads this on the
+# first CUDA allocation, so it only has to be set before the model loads.
+# An explicit PYTORCH_CUDA_ALLOC_CONF in the environment takes precedence.
+CUDA_ALLOC_CONF = "expandable_segments:True,max_split_size_mb=512"
+
+# Background threads writing finished images (PNG encode + metadata JSON), so
+# the generator starts the next image instead of waiting on the disk
+IMAGE_SAVE_WORKERS = 2
+
+# Component-type-specific quality boosters appended to every image prompt
+_QUALITY_TAGS: Dict[str, tuple] = {
+    # Emphasize single isolated modular asset for 3D conversion
+    "structural": (
+        "3D game asset render",
+        "single piece",
+        "centered composition",
+        "isolated object",
+        "pure white background",
+        "product photography style",
+        "orthographic view",
+        "white studio lighting",
+        "no shadows",
+        "modular design",
+        "clean surfaces",
+        "professional 3D render",
+        "8k resolution",
+    ),
+    # Emphasize single isolated light fixture asset
+    "light": (
+        "3D game asset render",
+        "single fixture",
+        "centered composition",
+        "isolated light fixture",
+        "pure white background",
+        "product photography style",
+        "white studio lighting",
+        "illumination visible",
+        "glowing elements",
+        "professional 3D render",
+        "highly detailed",
+        "8k resolution",
+    ),
+    # For rooms, we still want scenes but from asset perspective
+    "room": (
+        "interior architecture",
+        "atmospheric lighting",
+        "cinematic composition",
+        "professional concept art",
+        "8k resolution",
+        "wide angle perspective",
+    ),
+    # Facility or other: emphasize single isolated console/equipment asset
+    "other": (
+        "3D game asset render",
+        "single object",
+        "centered composition",
+        "isolated object",
+        "pure white background",
+        "product photography style",
+        "white studio lighting",
+        "highly detailed",
+        "professional 3D render",
+        "8k resolution",
+        "dramatic lighting",
+    ),
+}
+_QUALITY_TAGS_JOINED: Dict[str, str] = {k: ", ".join(v) for k, v in _QUALITY_TAGS.items()}
 
 
 class ImageManifest:
@@ -49,8 +129,7 @@ class ImageManifest:
     def save(self, path: Path):
         """Save manifest to JSON file."""
         path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w") as f:
-            json.dump(self.to_dict(), f, indent=2)
+        write_json(path, self.to_dict())
 
 
 class ImagePipeline:
@@ -60,11 +139,66 @@ class ImagePipeline:
         self,
         image_config: Optional[ImageConfig] = None,
         output_dir: Path = Path("output/images"),
-        model_type: ModelType = ModelType.FLUX_SCHNELL
+        model_type: ModelType = ModelType.FLUX_SCHNELL,
+        quantize: str = "none",
+        cuda_graphs: bool = False,
+        max_batch: int = 4,
+        **generator_overrides
     ):
+        """
+        Args:
+            image_config: Generation settings recorded in the manifest
+            output_dir: Where generated images are saved
+            model_type: Image generation model (see ModelType)
+            quantize: "none", "int8" or "fp8" weight quantization (QUANTIZABLE_MODELS only)
+            cuda_graphs: Replay fixed-shape denoise steps as CUDA graphs (CUDA_GRAPH_MODELS only)
+            max_batch: Most queued images generate_from_manifest denoises together
+            **generator_overrides: Config overrides passed to get_generator()
+        """
+        os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", CUDA_ALLOC_CONF)
         self.config = image_config or ImageConfig()
-        self.generator = create_generator(model_type)
+        if quantize != "none":
+            if model_type not in QUANTIZABLE_MODELS:
+                raise ValueError(f"Quantization is not supported for model type: {model_type}")
+            generator_overrides["quantize"] = quantize
+        if cuda_graphs:
+            if model_type not in CUDA_GRAPH_MODELS:
+                raise ValueError(f"CUDA graphs are not supported for model type: {model_type}")
+            generator_overrides["cuda_graphs"] = True
+        # Shared per (model, config), so pipelines for several ships load the model once
+        self.generator = get_generator(model_type, **generator_overrides)
+        # Held around every generation call: another pipeline may be using it
+        self._generator_lock = generator_lock(self.generator)
         self.output_dir = Path(output_dir)
+        self.max_batch = max_batch
+        self._save_pool: Optional[ThreadPoolExecutor] = None
+        self._save_futures = []
+    
+    @contextmanager
+    def _saving(self):
+        """
+        Run background image saves for the duration of one generation call.
+        
+        The save threads only live inside the block, so no idle pool outlives
+        the call (e.g. when batch_process_images later starts worker
+        processes). On exit every queued image is on disk; any failed write
+        is re-raised.
+        """
+        with ThreadPoolExecutor(max_workers=IMAGE_SAVE_WORKERS) as pool:
+            self._save_pool = pool
+            try:
+                yield
+            finally:
+                self._save_pool = None
+        futures, self._save_futures = self._save_futures, []
+        for future in futures:
+            future.result()
+    
+    def _save_image(self, result: Dict[str, Any], image_path: Path):
+        """Queue an image (and its metadata) to be written in the background (see _saving)."""
+        self._save_futures.append(
+            self._save_pool.submit(save_generated_image, self.generator, result, image_path)
+        )
     
     def generate_from_manifest(
         self,
@@ -101,17 +235,28 @@ class ImagePipeline:
         print(f"Resolution: {self.config.resolution}x{self.config.resolution}")
         print(f"{'='*60}\n")
         
-        # Generate images for each component
+        # Queue every image up front; the server's worker thread keeps the GPU
+        # busy (batching requests together) while results are saved here
         components_with_images = []
         
-        for comp_desc in tqdm(desc_manifest.components, desc="Generating images"):
-            component_images = self._generate_component_images(
-                comp_desc,
-                desc_manifest.seed,
-                negative_prompt,
-                generate_angles
-            )
-            components_with_images.append(component_images)
+        server = InferenceServer(self._generate_many, max_batch=self.max_batch)
+        with self._saving(), server:
+            pending = [
+                self._submit_component_images(
+                    server,
+                    comp_desc,
+                    desc_manifest.seed,
+                    negative_prompt,
+                    generate_angles
+                )
+                for comp_desc in desc_manifest.components
+            ]
+            for comp_desc, requests in tqdm(
+                zip(desc_manifest.components, pending),
+                total=len(pending),
+                desc="Generating images"
+            ):
+                components_with_images.append(self._collect_component_images(comp_desc, requests))
         
         # Create image manifest
         image_manifest = ImageManifest(
@@ -132,15 +277,94 @@ class ImagePipeline:
         
         return image_manifest
     
-    def _generate_component_images(
+    def generate_batch(
+        self,
+        descriptions: Union[DescriptionManifest, Iterable[ComponentDescription]],
+        output_dir: Optional[Path] = None,
+        ship_type_id: Optional[str] = None,
+        style_id: Optional[str] = None,
+        negative_prompt: Optional[str] = None,
+        seed: Optional[int] = None
+    ) -> Dict[str, str]:
+        """
+        Generate the main image for every component, batching prompts through
+        the generator so several images share each denoising step.
+        
+        Args:
+            descriptions: Description manifest or list of component descriptions
+            output_dir: Where to save images (defaults to the pipeline's output_dir)
+            ship_type_id: Ship type, for logging
+            style_id: Style, for logging
+            negative_prompt: Optional negative prompt for all generations
+            seed: Base seed, incremented per component (defaults to the manifest seed)
+            
+        Returns:
+            Dict mapping component_id to saved image path
+        """
+        if isinstance(descriptions, DescriptionManifest):
+            ship_type_id = ship_type_id or descriptions.ship_type_id
+            style_id = style_id or descriptions.style_id
+            seed = descriptions.seed if seed is None else seed
+            components = list(descriptions.components)
+        else:
+            components = list(descriptions)
+        
+        output_dir = Path(output_dir) if output_dir is not None else self.output_dir
+        if negative_prompt is None:
+            negative_prompt = "blurry, low quality, distorted, text, watermark"
+        
+        print(f"\n{'='*60}")
+        print("Batch Image Generation")
+        print(f"{'='*60}")
+        print(f"Ship Type: {ship_type_id}")
+        print(f"Style: {style_id}")
+        print(f"Components: {len(components)}")
+        print(f"{'='*60}\n")
+        
+        prompts = [self._build_image_prompt(comp_desc) for comp_desc in components]
+        seeds = [seed + i for i in range(len(prompts))] if seed is not None else None
+        with self._generator_lock:
+            results = generate_images(self.generator, prompts, negative_prompt, seeds)
+        
+        image_paths = {}
+        with self._saving():
+            for comp_desc, result in zip(components, results):
+                component_id = comp_desc.component_id
+                image_path = output_dir / component_id / f"{component_id}_main.png"
+                self._save_image(result, image_path)
+                image_paths[comp_desc.component_id] = str(image_path)
+        
+        print(f"\n[OK] Generated images for {len(image_paths)} components")
+        
+        return image_paths
+    
+    def _generate_many(
+        self,
+        prompts: List[str],
+        negative_prompt: Optional[str],
+        seeds: List[int]
+    ) -> List[Dict[str, Any]]:
+        """Generate one image per prompt (InferenceServer's batch function).
+        
+        Generators with generate_images() (FLUX.1-schnell, Qwen) denoise the
+        whole micro-batch in one pipeline call; the rest loop over generate().
+        """
+        with self._generator_lock:
+            return generate_images(self.generator, prompts, negative_prompt, seeds)
+    
+    def _submit_component_images(
         self,
+        server: InferenceServer,
         comp_desc: ComponentDescription,
         base_seed: int,
         negative_prompt: Optional[str],
         generate_angles: bool
-    ) -> Dict[str, Any]:
-        """Generate images for a single component."""
+    ) -> List[Dict[str, Any]]:
+        """Queue a component's main image (and camera angles) on the inference server.
         
+        Returns:
+            One entry per image: its manifest fields plus the pending result
+        """
         component_dir = self.output_dir / comp_desc.component_id
         component_dir.mkdir(parents=True, exist_ok=True)
         
@@ -151,50 +375,49 @@ class ImagePipeline:
         if negative_prompt is None:
             negative_prompt = "blurry, low quality, distorted, text, watermark"
         
-        images = []
-        
-        # Generate main image
+        # Main image
         seed = base_seed
-        result = self.generator.generate(
-            prompt=prompt,
-            negative_prompt=negative_prompt,
-            seed=seed
-        )
-        
-        # Save main image
-        image_path = component_dir / f"{comp_desc.component_id}_main.png"
-        self.generator.save_image(result, image_path, save_metadata=True)
-        
-        images.append({
+        requests = [{
             "view": "main",
-            "path": str(image_path.relative_to(self.output_dir.parent)),
+            "path": component_dir / f"{comp_desc.component_id}_main.png",
             "seed": seed,
-            "prompt": prompt
-        })
+            "prompt": prompt,
+            "future": server.submit(prompt, seed, negative_prompt),
+        }]
         
-        # Generate additional angles if requested
+        # Additional angles if requested
         if generate_angles and comp_desc.camera_angles:
             for i, angle in enumerate(comp_desc.camera_angles[:3], start=1):  # Max 3 angles
                 angle_prompt = f"{prompt}, {angle} view"
                 angle_seed = seed + i
-                
-                result = self.generator.generate(
-                    prompt=angle_prompt,
-                    negative_prompt=negative_prompt,
-                    seed=angle_seed
-                )
-                
                 angle_name = angle.lower().replace(" ", "_").replace("/", "_")
-                image_path = component_dir / f"{comp_desc.component_id}_{angle_name}.png"
-                self.generator.save_image(result, image_path, save_metadata=True)
-                
-                images.append({
+                requests.append({
                     "view": angle,
-                    "path": str(image_path.relative_to(self.output_dir.parent)),
+                    "path": component_dir / f"{comp_desc.component_id}_{angle_name}.png",
                     "seed": angle_seed,
-                    "prompt": angle_prompt
+                    "prompt": angle_prompt,
+                    "future": server.submit(angle_prompt, angle_seed, negative_prompt),
                 })
         
+        return requests
+    
+    def _collect_component_images(
+        self,
+        comp_desc: ComponentDescription,
+        requests: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Wait for a component's images, queue their saves and build its manifest entry."""
+        images = []
+        for request in requests:
+            image_path = request["path"]
+            self._save_image(request["future"].result(), image_path)
+            images.append({
+                "view": request["view"],
+                "path": str(image_path.relative_to(self.output_dir.parent)),
+                "seed": request["seed"],
+                "prompt": request["prompt"]
+            })
+        
         return {
             "component_id": comp_desc.component_id,
             "component_type": comp_desc.component_type,
@@ -212,66 +435,9 @@ class ImagePipeline:
             prompt_parts.append(", ".join(comp_desc.style_tags))
         
         # Add component-type-specific quality boosters for ISOLATED 3D ASSETS
-        if comp_desc.component_type == "structural":
-            # Emphasize single isolated modular asset for 3D conversion
-            quality_tags = [
-                "3D game asset render",
-                "single piece",
-                "centered composition",
-                "isolated object",
-                "pure white background",
-                "product photography style",
-                "orthographic view",
-                "white studio lighting",
-                "no shadows",
-                "modular design",
-                "clean surfaces",
-                "professional 3D render",
-                "8k resolution"
-            ]
-        elif comp_desc.component_type == "light":
-            # Emphasize single isolated light fixture asset
-            quality_tags = [
-                "3D game asset render",
-                "single fixture",
-                "centered composition",
-                "isolated light fixture",
-                "pure white background",
-                "product photography style",
-                "white studio lighting",
-                "illumination visible",
-                "glowing elements",
-                "professional 3D render",
-                "highly detailed",
-                "8k resolution"
-            ]
-        elif comp_desc.component_type == "room":
-            # For rooms, we still want scenes but from asset perspective
-            quality_tags = [
-                "interior architecture",
-                "atmospheric lighting",
-                "cinematic composition",
-                "professional concept art",
-                "8k resolution",
-                "wide angle perspective"
-            ]
-        else:  # facility or other
-            # Emphasize single isolated console/equipment asset
-            quality_tags = [
-                "3D game asset render",
-                "single object",
-                "centered composition",
-                "isolated object",
-                "pure white background",
-                "product photography style",
-                "white studio lighting",
-                "highly detailed",
-                "professional 3D render",
-                "8k resolution",
-                "dramatic lighting"
-            ]
-        
-        prompt_parts.extend(quality_tags)
+        prompt_parts.append(
+            _QUALITY_TAGS_JOINED.get(comp_desc.component_type, _QUALITY_TAGS_JOINED["other"])
+        )
         
         return ", ".join(prompt_parts)
 
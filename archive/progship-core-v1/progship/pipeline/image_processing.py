@@ -3,12 +3,31 @@ Image post-processing utilities.
 Handles cropping, resizing, thumbnail generation, and quality validation.
 """
 
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Optional, Tuple, List, Dict, Any
-from PIL import Image, ImageStat, ImageOps
+from PIL import Image
 import numpy as np
 import json
 
+from ._img_kernels import row_col_min, rgb_moments, set_kernel_threads
+
+try:
+    import orjson
+
+    def write_json(path: Path, data: Any):
+        """Write data as indented JSON (orjson serializes in C, numpy included)."""
+        Path(path).write_bytes(
+            orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        )
+except ImportError:
+    def write_json(path: Path, data: Any):
+        """Write data as indented JSON."""
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
 
 class ImageProcessor:
     """Utility class for image post-processing operations."""
@@ -23,26 +42,28 @@ class ImageProcessor:
             threshold: Pixel value threshold for detecting content (0-255)
             
         Returns:
-            Cropped PIL Image
+            Cropped PIL Image (the input image itself if nothing is cropped)
         """
-        # Convert to grayscale for content detection
-        gray = image.convert('L')
-        np_image = np.array(gray)
-        
-        # Find rows and columns with content (below threshold means dark = content)
-        # Invert logic: we want to keep areas with significant variation from white
-        mask = np_image < (255 - threshold)
-        
-        # Find bounding box of content
-        rows = np.any(mask, axis=1)
-        cols = np.any(mask, axis=0)
-        
-        if not rows.any() or not cols.any():
+        # Convert to grayscale for content detection (asarray avoids a second copy)
+        np_image = np.asarray(image.convert('L'))
+        
+        # Content = pixels significantly darker than white. A row/column has
+        # content iff its darkest pixel does, so one scan for the row and
+        # column minima replaces building a full-size boolean mask
+        cutoff = 255 - threshold
+        row_min, col_min = row_col_min(np_image)
+        rows = row_min < cutoff
+        cols = col_min < cutoff
+        
+        if not rows.any():
             # No content detected, return original
             return image
         
-        row_start, row_end = np.where(rows)[0][[0, -1]]
-        col_start, col_end = np.where(cols)[0][[0, -1]]
+        # First and last True of each 1D mask
+        row_start = int(rows.argmax())
+        row_end = len(rows) - 1 - int(rows[::-1].argmax())
+        col_start = int(cols.argmax())
+        col_end = len(cols) - 1 - int(cols[::-1].argmax())
         
         # Add small padding (5% of dimension)
         height, width = np_image.shape
@@ -54,6 +75,10 @@ class ImageProcessor:
         col_start = max(0, col_start - pad_w)
         col_end = min(width, col_end + pad_w)
         
+        if (col_start, row_start, col_end, row_end) == (0, 0, width, height):
+            # Content reaches the padded borders; nothing to crop
+            return image
+        
         # Crop image
         return image.crop((col_start, row_start, col_end, row_end))
     
@@ -96,7 +121,8 @@ class ImageProcessor:
     def resize(
         image: Image.Image, 
         size: Tuple[int, int],
-        maintain_aspect: bool = True
+        maintain_aspect: bool = True,
+        in_place: bool = False
     ) -> Image.Image:
         """
         Resize image to target size.
@@ -105,12 +131,14 @@ class ImageProcessor:
             image: PIL Image to resize
             size: Target (width, height)
             maintain_aspect: If True, maintains aspect ratio and fits within size
+            in_place: With maintain_aspect, shrink `image` itself instead of a
+                copy (for callers that no longer need the full-size image)
             
         Returns:
             Resized PIL Image
         """
         if maintain_aspect:
-            image_copy = image.copy()
+            image_copy = image if in_place else image.copy()
             image_copy.thumbnail(size, Image.Resampling.LANCZOS)
             return image_copy
         else:
@@ -119,7 +147,8 @@ class ImageProcessor:
     @staticmethod
     def generate_thumbnail(
         image: Image.Image,
-        size: Tuple[int, int] = (256, 256)
+        size: Tuple[int, int] = (256, 256),
+        in_place: bool = False
     ) -> Image.Image:
         """
         Generate thumbnail of image.
@@ -127,21 +156,25 @@ class ImageProcessor:
         Args:
             image: PIL Image to thumbnail
             size: Thumbnail size (default: 256x256)
+            in_place: Shrink `image` itself instead of a copy (for callers
+                that no longer need the full-size image)
             
         Returns:
             Thumbnail PIL Image
         """
-        thumb = image.copy()
+        thumb = image if in_place else image.copy()
         thumb.thumbnail(size, Image.Resampling.LANCZOS)
         return thumb
     
     @staticmethod
-    def validate_quality(image: Image.Image) -> Dict[str, Any]:
+    def validate_quality(image: Image.Image, pixels: Optional[np.ndarray] = None) -> Dict[str, Any]:
         """
         Validate image quality and detect common issues.
         
         Args:
             image: PIL Image to validate
+            pixels: The image's RGB pixels as a uint8 (H, W, 3) array, if the
+                caller already has them (otherwise converted here)
             
         Returns:
             Dict with validation results and issues
@@ -149,8 +182,10 @@ class ImageProcessor:
         issues = []
         metrics = {}
         
-        # Convert to RGB for analysis
-        rgb_image = image.convert('RGB')
+        # Every metric below reads this one uint8 array; mean and stddev come
+        # from a single float64-accumulating pass (see _img_kernels)
+        if pixels is None:
+            pixels = np.asarray(image.convert('RGB'))
         
         # Check dimensions
         width, height = image.size
@@ -161,8 +196,8 @@ class ImageProcessor:
             issues.append(f"Image too small: {width}x{height} (min 256x256)")
         
         # Check if image is completely black or white
-        stat = ImageStat.Stat(rgb_image)
-        mean_values = stat.mean
+        mean_rgb, stddev_rgb = rgb_moments(pixels)
+        mean_values = [float(v) for v in mean_rgb]
         metrics['mean_rgb'] = mean_values
         
         # Check for near-black image (all channels < 10)
@@ -174,7 +209,7 @@ class ImageProcessor:
             issues.append("Image is nearly white (possible generation failure)")
         
         # Check contrast (standard deviation)
-        stddev_values = stat.stddev
+        stddev_values = [float(v) for v in stddev_rgb]
         metrics['stddev_rgb'] = stddev_values
         avg_stddev = sum(stddev_values) / len(stddev_values)
         
@@ -183,14 +218,13 @@ class ImageProcessor:
         
         # Check for excessive noise/artifacts (high variance in small regions)
         # Sample 10x10 patches and check variance
-        np_image = np.array(rgb_image)
         if width > 100 and height > 100:
             # Sample center patch
-            center_patch = np_image[
+            center_patch = pixels[
                 height//2-50:height//2+50,
                 width//2-50:width//2+50
             ]
-            patch_variance = np.var(center_patch)
+            patch_variance = center_patch.var(dtype=np.float64)
             metrics['center_patch_variance'] = float(patch_variance)
             
             # Very high variance might indicate noise
@@ -210,7 +244,8 @@ def process_image(
     auto_crop: bool = True,
     generate_thumbnails: bool = True,
     validate: bool = True,
-    sizes: Optional[List[Tuple[int, int]]] = None
+    sizes: Optional[List[Tuple[int, int]]] = None,
+    optimize_png: bool = False
 ) -> Dict[str, Any]:
     """
     Process a single image with all post-processing steps.
@@ -222,15 +257,20 @@ def process_image(
         generate_thumbnails: Whether to generate thumbnails
         validate: Whether to validate quality
         sizes: List of (width, height) tuples for additional sizes
+        optimize_png: Smallest main PNG (max zlib effort, several times slower to write);
+            by default it is written with fast, light compression
         
     Returns:
         Dict with processing results and output paths
     """
+    png_options = {'optimize': True} if optimize_png else {'compress_level': 1}
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    # Load image
+    # Decode once; validation and cropping both work on these pixels
     image = Image.open(input_path)
+    image.load()
+    source = image
     original_size = image.size
     
     processor = ImageProcessor()
@@ -242,7 +282,8 @@ def process_image(
     
     # Validate quality
     if validate:
-        validation = processor.validate_quality(image)
+        rgb_image = image if image.mode == 'RGB' else image.convert('RGB')
+        validation = processor.validate_quality(image, pixels=np.asarray(rgb_image))
         results['validation'] = validation
         
         if not validation['valid']:
@@ -255,7 +296,16 @@ def process_image(
     
     # Save main processed image
     main_output = output_dir / f"{input_path.stem}_processed.png"
-    image.save(main_output, 'PNG', optimize=True)
+    # Writers below truncate in place; drop any hard link left by an earlier
+    # run first, so the source it shares an inode with is never touched
+    main_output.unlink(missing_ok=True)
+    if image is source and source.format == 'PNG' and not optimize_png:
+        # Untouched PNG: copy the source rather than re-encoding it. Not a
+        # hard link: regenerating the source rewrites its file in place,
+        # which would silently change this output too
+        shutil.copyfile(input_path, main_output)
+    else:
+        image.save(main_output, 'PNG', **png_options)
     results['processed_files'].append({
         'type': 'main',
         'path': str(main_output),
@@ -266,10 +316,16 @@ def process_image(
     if generate_thumbnails:
         thumb_sizes = [(256, 256), (512, 512)] if sizes is None else sizes
         
-        for thumb_size in thumb_sizes:
-            thumb = processor.generate_thumbnail(image, thumb_size)
-            thumb_path = output_dir / f"{input_path.stem}_thumb_{thumb_size[0]}x{thumb_size[1]}.png"
-            thumb.save(thumb_path, 'PNG', optimize=True)
+        for i, thumb_size in enumerate(thumb_sizes):
+            # The main image is already saved, so the last thumbnail can
+            # shrink it in place rather than copying it first
+            last = i == len(thumb_sizes) - 1
+            thumb = processor.generate_thumbnail(image, thumb_size, in_place=last)
+            # Thumbnails are previews, so lossy WebP (far faster to encode and
+            # smaller than PNG); the main image above stays lossless PNG
+            thumb_name = f"{input_path.stem}_thumb_{thumb_size[0]}x{thumb_size[1]}.webp"
+            thumb_path = output_dir / thumb_name
+            thumb.save(thumb_path, 'WEBP', quality=90, method=4)
             results['processed_files'].append({
                 'type': 'thumbnail',
                 'path': str(thumb_path),
@@ -278,8 +334,7 @@ def process_image(
     
     # Save processing metadata
     metadata_path = output_dir / f"{input_path.stem}_processing.json"
-    with open(metadata_path, 'w') as f:
-        json.dump(results, f, indent=2)
+    write_json(metadata_path, results)
     
     return results
 
@@ -287,14 +342,22 @@ def process_image(
 def batch_process_images(
     image_manifest_path: Path,
     output_base_dir: Path = Path("output/images_processed"),
+    workers: Optional[int] = None,
     **process_kwargs
 ) -> Dict[str, Any]:
     """
     Batch process all images from an image manifest.
     
+    Images are independent, so they are processed concurrently in worker
+    processes: quality stats, cropping and the Python glue around each PIL
+    call all hold the GIL, which capped a thread pool well below core count.
+    Workers only run PIL/numpy code, never torch, so it is safe to start them
+    from a process that has already used CUDA for generation.
+    
     Args:
         image_manifest_path: Path to image manifest JSON
         output_base_dir: Base directory for processed images
+        workers: Number of images processed at once (default: CPU count)
         **process_kwargs: Additional arguments for process_image()
         
     Returns:
@@ -316,58 +379,76 @@ def batch_process_images(
         'skipped': 0
     }
     
-    # Process each component's images
-    for component in manifest['components']:
-        component_id = component['component_id']
-        component_results = {
-            'component_id': component_id,
-            'images': []
-        }
-        
-        for image_info in component['images']:
-            results['total_images'] += 1
-            image_path_str = image_info['path']
-            
-            # Resolve path relative to manifest directory
-            image_path = manifest_dir / image_path_str
-            
-            if not image_path.exists():
-                print(f"⚠️  Image not found: {image_path}")
-                results['skipped'] += 1
-                continue
+    # One kernel thread per worker: the pool already occupies every core
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=set_kernel_threads, initargs=(1,)
+    ) as executor:
+        # Submit each component's images; an image referenced by several
+        # components is processed once (into the first one's directory)
+        pending = []
+        submitted = {}
+        for component in manifest['components']:
+            component_id = component['component_id']
+            futures = []
             
-            # Create output directory for this component
-            output_dir = output_base_dir / component_id
-            
-            # Process image
-            try:
-                process_result = process_image(
-                    image_path,
-                    output_dir,
-                    **process_kwargs
-                )
-                
-                component_results['images'].append(process_result)
+            for image_info in component['images']:
                 results['total_images'] += 1
-                results['total_processed'] += 1
+                image_path_str = image_info['path']
                 
-                # Check for issues
-                if 'validation' in process_result and not process_result['validation']['valid']:
-                    results['issues_found'] += 1
+                # Resolve path relative to manifest directory
+                image_path = manifest_dir / image_path_str
                 
-            except Exception as e:
-                print(f"❌ Error processing {image_path}: {e}")
-                component_results['images'].append({
-                    'input_path': str(image_path),
-                    'error': str(e)
-                })
-        
-        results['components'].append(component_results)
+                if not image_path.exists():
+                    print(f"⚠️  Image not found: {image_path}")
+                    results['skipped'] += 1
+                    continue
+                
+                if image_path not in submitted:
+                    # Create output directory for this component
+                    output_dir = output_base_dir / component_id
+                    
+                    # Process image
+                    submitted[image_path] = executor.submit(
+                        process_image,
+                        image_path,
+                        output_dir,
+                        **process_kwargs
+                    )
+                futures.append((image_path, submitted[image_path]))
+            
+            pending.append((component_id, futures))
+        
+        # Collect results in manifest order
+        for component_id, futures in pending:
+            component_results = {
+                'component_id': component_id,
+                'images': []
+            }
+            
+            for image_path, future in futures:
+                try:
+                    process_result = future.result()
+                    
+                    component_results['images'].append(process_result)
+                    results['total_processed'] += 1
+                    
+                    # Check for issues
+                    if 'validation' in process_result and not process_result['validation']['valid']:
+                        results['issues_found'] += 1
+                    
+                except Exception as e:
+                    print(f"❌ Error processing {image_path}: {e}")
+                    component_results['images'].append({
+                        'input_path': str(image_path),
+                        'error': str(e)
+                    })
+            
+            results['components'].append(component_results)
     
     # Save batch results
     results_path = output_base_dir / "processing_results.json"
     results_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(results_path, 'w') as f:
-        json.dump(results, f, indent=2)
+    write_json(results_path, results)
     
     return results
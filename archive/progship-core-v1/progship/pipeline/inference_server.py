@@ -0,0 +1,137 @@
+"""
+Background image-inference worker.
+
+Callers submit (prompt, seed) requests and get Futures back; a single worker
+thread owns the GPU, coalescing requests that arrive close together into
+micro-batches so they share each denoising step.
+"""
+
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# Generates one image per prompt: (prompts, negative_prompt, seeds) -> results
+BatchGenerateFn = Callable[[List[str], Optional[str], List[int]], List[Dict[str, Any]]]
+
+
+@dataclass
+class ImageRequest:
+    """A single queued generation request."""
+    prompt: str
+    seed: int
+    negative_prompt: Optional[str] = None
+    future: Future = field(default_factory=Future)
+
+
+class InferenceServer:
+    """Runs generation requests on a background thread, batching them on the fly."""
+
+    def __init__(
+        self,
+        generate_batch: BatchGenerateFn,
+        max_batch: int = 4,
+        batch_window: float = 0.05
+    ):
+        """
+        Start the worker thread.
+
+        Args:
+            generate_batch: Generates a micro-batch (one pipeline call where supported)
+            max_batch: Most requests coalesced into one call
+            batch_window: Seconds to wait for more requests after the first arrives
+        """
+        self.generate_batch = generate_batch
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._requests: "queue.Queue[Optional[ImageRequest]]" = queue.Queue()
+        self._closing = False
+        self._thread = threading.Thread(target=self._worker, name="image-inference", daemon=True)
+        self._thread.start()
+
+    def submit(self, prompt: str, seed: int, negative_prompt: Optional[str] = None) -> Future:
+        """
+        Queue a request.
+
+        Returns:
+            Future resolving to the generator's result dict for this prompt
+        """
+        request = ImageRequest(prompt=prompt, seed=seed, negative_prompt=negative_prompt)
+        self._requests.put(request)
+        return request.future
+
+    def close(self, cancel_pending: bool = False):
+        """
+        Stop the worker thread once it is idle.
+        
+        Args:
+            cancel_pending: Cancel requests still waiting in the queue instead
+                of generating them (the batch already running still finishes)
+        """
+        if cancel_pending:
+            while True:
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is not None:
+                    request.future.cancel()
+        self._requests.put(None)
+        self._thread.join()
+
+    def __enter__(self) -> "InferenceServer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # On an error (or Ctrl-C) nobody will collect the rest; don't render it
+        self.close(cancel_pending=exc_type is not None)
+
+    def _next_batch(self) -> List[ImageRequest]:
+        """Block for one request, then take whatever else arrives within the window."""
+        first = self._requests.get()
+        if first is None:
+            self._closing = True
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            try:
+                request = self._requests.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if request is None:
+                self._closing = True
+                break
+            batch.append(request)
+        return batch
+
+    def _worker(self):
+        while not self._closing:
+            batch = [r for r in self._next_batch() if r.future.set_running_or_notify_cancel()]
+
+            # One pipeline call can only apply a single negative prompt
+            groups: Dict[Optional[str], List[ImageRequest]] = defaultdict(list)
+            for request in batch:
+                groups[request.negative_prompt].append(request)
+
+            for negative_prompt, requests in groups.items():
+                try:
+                    results = self.generate_batch(
+                        [r.prompt for r in requests], negative_prompt, [r.seed for r in requests]
+                    )
+                except Exception as e:
+                    for request in requests:
+                        request.future.set_exception(e)
+                    continue
+                for request, result in zip(requests, results):
+                    request.future.set_result(result)
+                # Never leave a caller waiting on a result that didn't come back
+                for request in requests[len(results):]:
+                    request.future.set_exception(RuntimeError(
+                        f"generate_batch returned {len(results)} results "
+                        f"for {len(requests)} prompts"
+                    ))
@@ -1,8 +1,10 @@
 """LLM client abstraction for Ollama-powered text generation."""
 
+import asyncio
 from typing import List, Optional
 from dataclasses import dataclass
 
+import httpx
 import ollama
 
 
@@ -15,6 +17,8 @@ class LLMConfig:
     top_p: float = 0.9
     max_tokens: int = 300
     base_url: str = "http://localhost:11434"  # Ollama server URL
+    concurrency: int = 8  # Requests in flight during batch_generate (see OLLAMA_NUM_PARALLEL)
+    embedding_model: str = "all-minilm"  # Ollama embedding model (semantic cache lookups)
 
 
 class OllamaClient:
@@ -29,6 +33,14 @@ class OllamaClient:
         self.config = config or LLMConfig()
         self._client = ollama.Client(host=self.config.base_url)
         
+    def _options(self, max_tokens: Optional[int]) -> dict:
+        """Build Ollama sampling options."""
+        return {
+            "temperature": self.config.temperature,
+            "top_p": self.config.top_p,
+            "num_predict": max_tokens or self.config.max_tokens,
+        }
+    
     def generate(self, prompt: str, max_tokens: Optional[int] = None) -> str:
         """Generate text from a single prompt.
         
@@ -39,22 +51,39 @@ class OllamaClient:
         Returns:
             Generated text response
         """
-        options = {
-            "temperature": self.config.temperature,
-            "top_p": self.config.top_p,
-            "num_predict": max_tokens or self.config.max_tokens,
-        }
-        
         response = self._client.generate(
             model=self.config.model,
             prompt=prompt,
-            options=options,
+            options=self._options(max_tokens),
         )
         
         return response["response"]
     
+    async def _batch_generate_async(
+        self, prompts: List[str], max_tokens: Optional[int]
+    ) -> List[str]:
+        """Send all prompts concurrently, at most config.concurrency at a time."""
+        client = ollama.AsyncClient(host=self.config.base_url)
+        semaphore = asyncio.Semaphore(self.config.concurrency)
+        options = self._options(max_tokens)
+        
+        async def generate_one(prompt: str) -> str:
+            async with semaphore:
+                response = await client.generate(
+                    model=self.config.model,
+                    prompt=prompt,
+                    options=options,
+                )
+                return response["response"]
+        
+        return await asyncio.gather(*(generate_one(prompt) for prompt in prompts))
+    
     def batch_generate(self, prompts: List[str], max_tokens: Optional[int] = None) -> List[str]:
-        """Generate text from multiple prompts sequentially.
+        """Generate text from multiple prompts concurrently.
+        
+        Requests are independent HTTP round-trips, so up to config.concurrency
+        are kept in flight; the Ollama server batches them up to its
+        OLLAMA_NUM_PARALLEL setting.
         
         Args:
             prompts: List of input prompts
@@ -66,12 +95,22 @@ class OllamaClient:
         if not prompts:
             return []
         
-        results = []
-        for prompt in prompts:
-            response = self.generate(prompt, max_tokens)
-            results.append(response)
+        if self.config.concurrency <= 1 or len(prompts) == 1:
+            return [self.generate(prompt, max_tokens) for prompt in prompts]
         
-        return results
+        return asyncio.run(self._batch_generate_async(prompts, max_tokens))
+    
+    def embed(self, text: str) -> List[float]:
+        """Embed text with the configured embedding model.
+        
+        Args:
+            text: Text to embed
+            
+        Returns:
+            Embedding vector
+        """
+        response = self._client.embeddings(model=self.config.embedding_model, prompt=text)
+        return response["embedding"]
     
     def check_model(self) -> bool:
         """Check if configured model is available.
@@ -93,6 +132,82 @@ class OllamaClient:
         print(f"✓ Model {self.config.model} downloaded successfully")
 
 
+class VLLMClient:
+    """LLM client for a vLLM server's OpenAI-compatible API.
+    
+    Drop-in alternative to OllamaClient: batch_generate sends every prompt in
+    one /v1/completions request and lets vLLM's continuous batching pack them.
+    """
+    
+    def __init__(self, config: Optional[LLMConfig] = None, timeout: float = 600.0):
+        """Initialize vLLM client with configuration.
+        
+        Args:
+            config: LLM configuration; model is the served model name (defaults
+                to Qwen/Qwen2.5-7B-Instruct on http://localhost:8000)
+            timeout: Request timeout in seconds (a batch returns all at once)
+        """
+        self.config = config or LLMConfig(
+            model="Qwen/Qwen2.5-7B-Instruct", base_url="http://localhost:8000"
+        )
+        self._client = httpx.Client(base_url=self.config.base_url, timeout=timeout)
+    
+    def _complete(self, prompt, max_tokens: Optional[int]) -> List[str]:
+        """POST to /v1/completions and return choice texts in prompt order."""
+        response = self._client.post("/v1/completions", json={
+            "model": self.config.model,
+            "prompt": prompt,
+            "temperature": self.config.temperature,
+            "top_p": self.config.top_p,
+            "max_tokens": max_tokens or self.config.max_tokens,
+        })
+        response.raise_for_status()
+        choices = sorted(response.json()["choices"], key=lambda c: c["index"])
+        return [choice["text"] for choice in choices]
+    
+    def generate(self, prompt: str, max_tokens: Optional[int] = None) -> str:
+        """Generate text from a single prompt.
+        
+        Args:
+            prompt: Input text prompt
+            max_tokens: Override default max_tokens if provided
+            
+        Returns:
+            Generated text response
+        """
+        return self._complete(prompt, max_tokens)[0]
+    
+    def batch_generate(self, prompts: List[str], max_tokens: Optional[int] = None) -> List[str]:
+        """Generate text from multiple prompts in a single batched request.
+        
+        Args:
+            prompts: List of input prompts
+            max_tokens: Override default max_tokens if provided
+            
+        Returns:
+            List of generated text responses (same order as prompts)
+        """
+        if not prompts:
+            return []
+        return self._complete(prompts, max_tokens)
+    
+    def embed(self, text: str) -> List[float]:
+        """Embed text via /v1/embeddings (the server must host config.embedding_model).
+        
+        Args:
+            text: Text to embed
+            
+        Returns:
+            Embedding vector
+        """
+        response = self._client.post("/v1/embeddings", json={
+            "model": self.config.embedding_model,
+            "input": text,
+        })
+        response.raise_for_status()
+        return response.json()["data"][0]["embedding"]
+
+
 def create_client(
     model: str = "qwen2.5:7b",
     temperature: float = 0.7,
@@ -3,6 +3,9 @@ Model registry for text-to-image generation.
 Makes it easy to add and swap image generation models.
 """
 
+import json
+import threading
+import weakref
 from dataclasses import dataclass
 from enum import Enum
 from typing import Optional, Protocol, List, Dict, Any
@@ -46,6 +49,12 @@ class ImageGeneratorProtocol(Protocol):
     ) -> List[dict]:
         """Generate multiple images from list of prompts."""
         ...
+    
+    # Generators that can batch in memory also implement:
+    #   generate_images(prompts, negative_prompt, seeds) -> List[dict]  (no file writes)
+    #   save_image(result, output_path, save_metadata)
+    # generate_images() and save_generated_image() below fall back to
+    # generate() and a plain PNG + JSON write for the ones that don't.
 
 
 class ModelType(str, Enum):
@@ -121,6 +130,15 @@ MODEL_REGISTRY: Dict[str, ModelInfo] = {
 }
 
 
+# Models whose generator accepts quantize="int8"/"fp8" (8-bit transformer
+# and text-encoder weights, roughly halving their VRAM)
+QUANTIZABLE_MODELS = {ModelType.FLUX_SCHNELL}
+
+# Models whose generator accepts cuda_graphs=True (compiled, fixed-shape
+# denoise steps replayed as CUDA graphs)
+CUDA_GRAPH_MODELS = {ModelType.FLUX_SCHNELL}
+
+
 def get_model_info(model_type: str) -> ModelInfo:
     """Get metadata for a model type."""
     if model_type not in MODEL_REGISTRY:
@@ -204,3 +222,114 @@ def create_generator(
     
     else:
         raise ValueError(f"Model type not implemented: {model_type}")
+
+
+
+# Generators handed out by get_generator(), keyed by (model_type, sorted overrides)
+_shared_generators: Dict[tuple, ImageGeneratorProtocol] = {}
+# One lock per generator instance (see generator_lock)
+_generator_locks: "weakref.WeakKeyDictionary[Any, threading.Lock]" = weakref.WeakKeyDictionary()
+_registry_lock = threading.Lock()
+
+
+def get_generator(
+    model_type: str = ModelType.SEGMIND_VEGA,
+    **config_overrides
+) -> ImageGeneratorProtocol:
+    """
+    Like create_generator(), but returns one shared instance per distinct
+    (model_type, config) in this process.
+    
+    Generators load their model lazily and keep it, so sharing them means a
+    second ImagePipeline for the same model reuses the weights already in
+    VRAM instead of loading another copy. Callers that may run concurrently
+    must hold generator_lock(generator) around each generation call.
+    
+    Args:
+        model_type: Type of model to use (see ModelType enum)
+        **config_overrides: Override default config parameters
+        
+    Returns:
+        ImageGenerator instance (shared)
+    """
+    key = (model_type, tuple(sorted(config_overrides.items())))
+    try:
+        hash(key)
+    except TypeError:
+        # Unhashable override value: nothing to key a shared instance on
+        return create_generator(model_type, **config_overrides)
+    
+    with _registry_lock:
+        if key not in _shared_generators:
+            _shared_generators[key] = create_generator(model_type, **config_overrides)
+        return _shared_generators[key]
+
+
+def generator_lock(generator: ImageGeneratorProtocol) -> threading.Lock:
+    """
+    Lock serializing generation on one generator instance.
+    
+    A diffusers pipeline (and the generator's cached RNG state) must not be
+    driven from two threads at once, which happens when several
+    ImagePipelines share a generator from get_generator().
+    """
+    with _registry_lock:
+        lock = _generator_locks.get(generator)
+        if lock is None:
+            lock = _generator_locks[generator] = threading.Lock()
+        return lock
+
+
+def clear_generator_cache():
+    """Unload every shared generator's model and forget the instances."""
+    with _registry_lock:
+        generators = list(_shared_generators.values())
+        _shared_generators.clear()
+    for generator in generators:
+        unload = getattr(generator, "unload", None)
+        if unload is not None:
+            # Wait for any generation in progress to finish first
+            with generator_lock(generator):
+                unload()
+
+
+def generate_images(
+    generator: ImageGeneratorProtocol,
+    prompts: List[str],
+    negative_prompt: Optional[str] = None,
+    seeds: Optional[List[int]] = None
+) -> List[dict]:
+    """
+    Generate one in-memory image per prompt, batched where the generator can.
+    
+    Args:
+        generator: Any registry generator
+        prompts: Text prompts
+        negative_prompt: Negative prompt for every image
+        seeds: Per-prompt seeds (None for random)
+        
+    Returns:
+        Generation results (each with an 'image'), in prompt order
+    """
+    if hasattr(generator, "generate_images"):
+        return generator.generate_images(prompts, negative_prompt=negative_prompt, seeds=seeds)
+    if seeds is None:
+        seeds = [None] * len(prompts)
+    return [
+        generator.generate(prompt=prompt, negative_prompt=negative_prompt, seed=seed)
+        for prompt, seed in zip(prompts, seeds)
+    ]
+
+
+def save_generated_image(generator: ImageGeneratorProtocol, result: dict, output_path: Path):
+    """Write a generation result's image and metadata JSON, via the generator if it can."""
+    if hasattr(generator, "save_image"):
+        generator.save_image(result, output_path, True)
+        return
+    
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    result["image"].save(output_path, "PNG", compress_level=1)
+    metadata = {k: v for k, v in result.items() if k not in ("image", "path")}
+    with open(output_path.with_suffix(".json"), "w") as f:
+        json.dump(metadata, f, indent=2, default=str)
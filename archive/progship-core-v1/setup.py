@@ -0,0 +1,18 @@
+"""
+Optional native build: `PROGSHIP_MYPYC=1 pip install --no-build-isolation .`
+compiles the pydantic-free hot helpers with mypyc (needs `mypy[mypyc]` and a
+C compiler). Without it this is a plain setuptools install; all metadata
+lives in pyproject.toml.
+"""
+
+import os
+
+from setuptools import setup
+
+ext_modules = []
+if os.environ.get("PROGSHIP_MYPYC") == "1":
+    from mypyc.build import mypycify
+
+    ext_modules = mypycify(["progship/data/models_fast.py"])
+
+setup(ext_modules=ext_modules)
@@ -0,0 +1,53 @@
+"""Tests for the asset bundle manifest export."""
+
+import msgspec
+
+from progship.export.bundle import AssetBundleManifest, AssetReference
+
+
+def _manifest(timestamp="2025-01-01T00:00:00", description="A bridge"):
+    return AssetBundleManifest(
+        ship_id="ship_1",
+        ship_type_id="colony",
+        style_id="ceramic",
+        seed=1,
+        generation_timestamp=timestamp,
+        structure_path="structure.json",
+        descriptions_path="descriptions.json",
+        assets={"bridge": AssetReference("bridge", "room", description=description)},
+        total_assets=1,
+        total_models=0,
+        total_images=0,
+        total_size_mb=0.0,
+    )
+
+
+def test_to_json_skips_when_only_the_timestamp_differs(tmp_path):
+    path = tmp_path / "manifest.json"
+    assert _manifest().to_json(path)
+    written = path.read_bytes()
+
+    assert not _manifest(timestamp="2025-06-01T00:00:00").to_json(path)
+    assert path.read_bytes() == written
+
+
+def test_to_json_rewrites_changed_or_unreadable_manifests(tmp_path):
+    path = tmp_path / "manifest.json"
+    _manifest().to_json(path)
+
+    assert _manifest(description="A larger bridge").to_json(path)
+    assert AssetBundleManifest.from_json(path).assets["bridge"].description == "A larger bridge"
+
+    path.write_text("{not json")
+    assert _manifest().to_json(path)
+    assert AssetBundleManifest.from_json(path) == _manifest()
+
+
+def test_from_json_round_trips_underscored_fields(tmp_path):
+    path = tmp_path / "manifest.json"
+    manifest = _manifest()
+    manifest.assets["bridge"].model_exists = True
+    manifest.to_json(path)
+
+    assert "_model_exists" in msgspec.json.decode(path.read_bytes())["assets"]["bridge"]
+    assert AssetBundleManifest.from_json(path).assets["bridge"].model_exists
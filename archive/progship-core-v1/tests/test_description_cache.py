@@ -0,0 +1,113 @@
+"""Tests for the SQLite description cache."""
+
+import hashlib
+import json
+
+import pytest
+
+from progship.pipeline.cache import DescriptionCache
+
+# Fixed embeddings: the paraphrase sits close to the original prompt, the
+# unrelated prompt is orthogonal to it
+VECTORS = {
+    "Describe the bridge": [1.0, 0.0, 0.0],
+    "Describe the ship's bridge": [0.99, 0.1, 0.0],
+    "Describe the cargo hold": [0.0, 0.0, 1.0],
+}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DescriptionCache(
+        cache_dir=str(tmp_path), embedder=VECTORS.__getitem__, similarity_threshold=0.9
+    )
+
+
+def _set(cache, component_id, prompt, seed=1, response="cached"):
+    cache.set("colony", "ceramic", seed, component_id, "room", prompt, response, "test-model")
+
+
+def test_exact_key_hit(cache):
+    _set(cache, "bridge", "Describe the bridge")
+
+    hit = cache.get("colony", "ceramic", 1, "bridge", "room")
+
+    assert hit.response == "cached"
+    assert hit.prompt == "Describe the bridge"
+
+
+def test_semantic_hit_for_same_component_other_seed(cache):
+    _set(cache, "bridge", "Describe the bridge")
+
+    hit = cache.get("colony", "ceramic", 2, "bridge", "room", prompt="Describe the ship's bridge")
+
+    assert hit is not None
+    assert hit.response == "cached"
+    assert cache._pending_vectors == {}
+
+
+def test_semantic_miss_below_threshold(cache):
+    _set(cache, "bridge", "Describe the bridge")
+
+    miss = cache.get("colony", "ceramic", 2, "bridge", "room", prompt="Describe the cargo hold")
+    assert miss is None
+    assert "Describe the cargo hold" in cache._pending_vectors
+
+    _set(cache, "bridge", "Describe the cargo hold", seed=2)
+    assert cache._pending_vectors == {}
+
+
+def test_semantic_match_never_crosses_components(cache):
+    _set(cache, "bridge", "Describe the bridge")
+
+    prompt = "Describe the bridge"
+    # Same prompt text, different component: must not reuse the bridge
+    assert cache.get("colony", "ceramic", 1, "engineering", "room", prompt=prompt) is None
+    # Same component in another style or ship type is a different component too
+    assert cache.get("colony", "steel", 1, "bridge", "room", prompt=prompt) is None
+    assert cache.get("freighter", "ceramic", 1, "bridge", "room", prompt=prompt) is None
+
+
+def test_legacy_files_imported_and_corrupt_ones_kept(tmp_path):
+    metadata = {
+        "ship_type_id": "colony", "style_id": "ceramic", "seed": 1,
+        "component_id": "bridge", "component_type": "room",
+    }
+    legacy_key = hashlib.sha256(b"colony|ceramic|1|bridge|room").hexdigest()
+    (tmp_path / f"{legacy_key}.json").write_text(json.dumps({
+        "prompt": "Describe the bridge", "response": "legacy", "timestamp": "2025-01-01T00:00:00",
+        "model_name": "test-model", "metadata": metadata,
+    }))
+    (tmp_path / "broken.json").write_text("{not json")
+
+    cache = DescriptionCache(cache_dir=str(tmp_path))
+
+    assert cache.get("colony", "ceramic", 1, "bridge", "room").response == "legacy"
+    assert not (tmp_path / f"{legacy_key}.json").exists()
+    assert not (tmp_path / "broken.json").exists()
+    assert (tmp_path / "broken.json.corrupt").read_text() == "{not json"
+
+
+def test_sha256_entries_rekeyed_on_open(tmp_path):
+    cache = DescriptionCache(cache_dir=str(tmp_path))
+    metadata = json.dumps({
+        "ship_type_id": "colony", "style_id": "ceramic", "seed": 1,
+        "component_id": "bridge", "component_type": "room",
+    })
+    rows = [
+        (hashlib.sha256(b"bridge").hexdigest(), "Describe the bridge", "old", metadata),
+        (hashlib.sha256(b"lost").hexdigest(), "Describe it", "lost", "{not json"),
+    ]
+    with cache._db:
+        cache._db.executemany(
+            "INSERT INTO entries (cache_key, prompt, response, timestamp, model_name, metadata, "
+            "last_access, size) VALUES (?, ?, ?, '2025-01-01T00:00:00', 'test-model', ?, 0, 0)",
+            rows,
+        )
+    cache._db.close()
+
+    reopened = DescriptionCache(cache_dir=str(tmp_path))
+
+    assert reopened.get("colony", "ceramic", 1, "bridge", "room").response == "old"
+    keys = [key for (key,) in reopened._db.execute("SELECT cache_key FROM entries")]
+    assert len(keys) == 1 and len(keys[0]) == 32
@@ -0,0 +1,24 @@
+"""Tests for the prompt embedding cache."""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from progship.pipeline.embedding_cache import PromptEmbeddingCache  # noqa: E402
+
+
+def test_variant_is_part_of_the_key(tmp_path):
+    cache = PromptEmbeddingCache(cache_dir=str(tmp_path))
+    calls = []
+
+    def encode(prompt):
+        calls.append(prompt)
+        return {"prompt_embeds": torch.full((1, 2), float(len(calls)))}
+
+    fp8 = cache.get_or_encode("bridge", "flux", "cpu", encode, "quantize=fp8|dtype=bfloat16")
+    again = cache.get_or_encode("bridge", "flux", "cpu", encode, "quantize=fp8|dtype=bfloat16")
+    full = cache.get_or_encode("bridge", "flux", "cpu", encode, "quantize=none|dtype=bfloat16")
+
+    assert calls == ["bridge", "bridge"]
+    assert torch.equal(fp8["prompt_embeds"], again["prompt_embeds"])
+    assert not torch.equal(fp8["prompt_embeds"], full["prompt_embeds"])
@@ -0,0 +1,44 @@
+"""Tests for FLUX.1-schnell's quantized-weight cache (CPU only, tiny T5)."""
+
+import pytest
+import torch
+
+quanto = pytest.importorskip("optimum.quanto")
+transformers = pytest.importorskip("transformers")
+
+from progship.pipeline.flux_schnell_generator import (  # noqa: E402
+    FluxSchnellConfig, FluxSchnellGenerator
+)
+
+
+def _tiny_t5():
+    config = transformers.T5Config(
+        vocab_size=32, d_model=16, d_kv=4, d_ff=32, num_layers=1, num_heads=2
+    )
+    return transformers.T5EncoderModel(config)
+
+
+def test_tied_t5_round_trips_through_quantized_cache(tmp_path):
+    generator = FluxSchnellGenerator(FluxSchnellConfig(
+        model_id="test/tiny", quantize="fp8", quantized_cache_dir=str(tmp_path)
+    ))
+    torch.manual_seed(0)
+    module = _tiny_t5().to(torch.bfloat16).eval()
+    quanto.quantize(module, weights=quanto.qfloat8)
+    quanto.freeze(module)
+
+    generator._save_quantized("text_encoder_2", module)
+
+    cache_dir = generator._quantized_dir()
+    restored = generator._read_quantized(
+        _tiny_t5,
+        cache_dir / "text_encoder_2.safetensors",
+        cache_dir / "text_encoder_2.qmap.json",
+    )
+
+    assert restored.shared.weight is restored.encoder.embed_tokens.weight
+    input_ids = torch.tensor([[1, 2, 3, 4]])
+    with torch.inference_mode():
+        expected = module(input_ids=input_ids).last_hidden_state
+        actual = restored(input_ids=input_ids).last_hidden_state
+    assert torch.equal(expected, actual)
@@ -0,0 +1,98 @@
+"""Tests for ImagePipeline batching against the generator protocol."""
+
+import json
+import threading
+
+from PIL import Image
+
+from progship.data.models import ComponentDescription
+from progship.pipeline import image_pipeline
+from progship.pipeline.image_pipeline import ImagePipeline
+
+
+class FakeGenerator:
+    """Only generate(), like the Janus and Ollama generators."""
+
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, prompt, negative_prompt=None, seed=None, output_path=None):
+        self.calls.append((prompt, seed))
+        return {"image": Image.new("RGB", (8, 8)), "path": None, "seed": seed, "prompt": prompt}
+
+
+class FakeBatchGenerator(FakeGenerator):
+    """In-memory batching plus its own save_image(), like FLUX.1-schnell."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.saved = []
+
+    def generate_images(self, prompts, negative_prompt=None, seeds=None):
+        self.batches.append(list(prompts))
+        return [
+            {"image": Image.new("RGB", (8, 8)), "seed": seed, "prompt": prompt}
+            for prompt, seed in zip(prompts, seeds)
+        ]
+
+    def save_image(self, result, output_path, save_metadata=True):
+        self.saved.append(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        result["image"].save(output_path)
+
+
+def _components(n):
+    return [
+        ComponentDescription(
+            component_id=f"comp_{i}",
+            component_type="facility",
+            base_description="base",
+            generated_description=f"description {i}",
+            style_tags=["white"],
+            camera_angles=[],
+        )
+        for i in range(n)
+    ]
+
+
+def _pipeline(monkeypatch, tmp_path, generator):
+    monkeypatch.setattr(image_pipeline, "get_generator", lambda *args, **kwargs: generator)
+    return ImagePipeline(output_dir=tmp_path)
+
+
+def test_generate_batch_batches_through_generate_images(monkeypatch, tmp_path):
+    generator = FakeBatchGenerator()
+    pipeline = _pipeline(monkeypatch, tmp_path, generator)
+
+    paths = pipeline.generate_batch(_components(3), seed=10)
+
+    assert len(generator.batches) == 1
+    assert len(generator.batches[0]) == 3
+    assert generator.calls == []
+    assert sorted(paths) == ["comp_0", "comp_1", "comp_2"]
+    assert all((tmp_path / c / f"{c}_main.png").exists() for c in paths)
+    assert len(generator.saved) == 3
+
+
+def test_generate_batch_falls_back_to_generate(monkeypatch, tmp_path):
+    generator = FakeGenerator()
+    pipeline = _pipeline(monkeypatch, tmp_path, generator)
+
+    paths = pipeline.generate_batch(_components(2), seed=5)
+
+    assert [seed for _, seed in generator.calls] == [5, 6]
+    for component_id, path in paths.items():
+        metadata = json.loads((tmp_path / component_id / f"{component_id}_main.json").read_text())
+        assert metadata["seed"] in (5, 6)
+        assert Image.open(path).size == (8, 8)
+
+
+def test_save_threads_do_not_outlive_the_call(monkeypatch, tmp_path):
+    pipeline = _pipeline(monkeypatch, tmp_path, FakeBatchGenerator())
+    before = set(threading.enumerate())
+
+    pipeline.generate_batch(_components(2), seed=1)
+
+    assert pipeline._save_pool is None
+    assert set(threading.enumerate()) <= before
@@ -0,0 +1,53 @@
+"""Tests for the batching InferenceServer."""
+
+import threading
+
+import pytest
+
+from progship.pipeline.inference_server import InferenceServer
+
+
+def test_coalesces_queued_requests_into_batches():
+    calls = []
+
+    def generate_batch(prompts, negative_prompt, seeds):
+        calls.append(list(prompts))
+        return [{"prompt": p, "seed": s} for p, s in zip(prompts, seeds)]
+
+    with InferenceServer(generate_batch, max_batch=2, batch_window=0.5) as server:
+        futures = [server.submit(f"p{i}", i) for i in range(3)]
+        results = [f.result(timeout=5) for f in futures]
+
+    assert [r["seed"] for r in results] == [0, 1, 2]
+    assert max(len(c) for c in calls) == 2
+    assert sum(len(c) for c in calls) == 3
+
+
+def test_fails_requests_missing_from_a_short_result():
+    with InferenceServer(lambda prompts, neg, seeds: [], batch_window=0.5) as server:
+        future = server.submit("p", 1)
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+
+def test_error_exit_cancels_queued_requests():
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def generate_batch(prompts, negative_prompt, seeds):
+        calls.append(list(prompts))
+        started.set()
+        release.wait(timeout=5)
+        return [{"prompt": p} for p in prompts]
+
+    with pytest.raises(KeyboardInterrupt):
+        with InferenceServer(generate_batch, max_batch=1, batch_window=0.0) as server:
+            futures = [server.submit(f"p{i}", i) for i in range(5)]
+            started.wait(timeout=5)
+            threading.Timer(0.1, release.set).start()
+            raise KeyboardInterrupt
+
+    assert calls == [["p0"]]
+    assert futures[0].result(timeout=5) == {"prompt": "p0"}
+    assert all(f.cancelled() for f in futures[1:])
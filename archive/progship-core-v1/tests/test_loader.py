@@ -0,0 +1,89 @@
+"""Tests for DatabaseLoader and its compiled (pickled) cache."""
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from progship.data import loader as loader_module
+from progship.data.loader import DatabaseLoader
+from progship.data.models import BoundingBox, FacilityVariant
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for path in DATA_DIR.glob("*.json"):
+        shutil.copy(path, tmp_path / path.name)
+    return tmp_path
+
+
+@pytest.fixture
+def compiled_cache(monkeypatch):
+    monkeypatch.setenv("PROGSHIP_CACHE", "1")
+
+
+def _loads_from_cache(data_dir, trusted=False):
+    """True if a new loader was served from an existing compiled cache."""
+    built = []
+    original = DatabaseLoader.preload_all
+
+    def preload_all(self):
+        built.append(True)
+        original(self)
+
+    DatabaseLoader.preload_all = preload_all
+    try:
+        DatabaseLoader(data_dir, trusted=trusted)
+    finally:
+        DatabaseLoader.preload_all = original
+    return not built
+
+
+def test_compiled_cache_round_trip(data_dir, compiled_cache):
+    first = DatabaseLoader(data_dir)
+    assert len(list(data_dir.glob("_compiled_*.pkl"))) == 1
+
+    assert _loads_from_cache(data_dir)
+    second = DatabaseLoader(data_dir)
+    assert second.load_facilities() == first.load_facilities()
+
+
+def test_compiled_cache_misses_when_data_changes(data_dir, compiled_cache):
+    DatabaseLoader(data_dir)
+    facilities = data_dir / "facilities.json"
+    stat = facilities.stat()
+    os.utime(facilities, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert not _loads_from_cache(data_dir)
+
+
+def test_compiled_cache_misses_when_model_code_changes(data_dir, compiled_cache, monkeypatch):
+    DatabaseLoader(data_dir)
+    monkeypatch.setattr(loader_module, "_model_code_version", lambda: "0.0.0-other")
+
+    assert not _loads_from_cache(data_dir)
+
+
+def test_compiled_cache_keyed_on_trusted(data_dir, compiled_cache):
+    DatabaseLoader(data_dir, trusted=True)
+
+    # Unvalidated objects are never served to a validating loader
+    assert not _loads_from_cache(data_dir, trusted=False)
+    assert _loads_from_cache(data_dir, trusted=False)
+
+
+def test_trusted_loading_matches_validated_loading(data_dir):
+    validated = DatabaseLoader(data_dir)
+    trusted = DatabaseLoader(data_dir, trusted=True)
+
+    for load in ("load_ship_types", "load_styles", "load_facilities", "load_rooms",
+                 "load_structural_elements", "load_light_fixtures"):
+        assert getattr(trusted, load)() == getattr(validated, load)(), load
+
+    # Nested models are built too, not left as plain dicts
+    facility = next(f for f in trusted.load_facilities().facilities if f.variants)
+    assert isinstance(facility.bounding_box, BoundingBox)
+    assert all(isinstance(variant, FacilityVariant) for variant in facility.variants)